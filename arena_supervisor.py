@@ -0,0 +1,303 @@
+"""
+arena_supervisor.py
+-------------------
+Host several independent matches (arenas) from one process tree.
+
+Each arena is a GameEngine with its own port pair, roster, timer and
+logger. Arenas live in a small pool of worker processes (spread least-
+loaded first), so busy arenas use separate cores instead of sharing one
+GIL. The supervisor talks to each worker over a multiprocessing Pipe:
+
+    sup = ArenaSupervisor(workers=2)
+    sup.add_arena("north", recv_port=7501, send_port=7500,
+                  roster=[("Alice", "red", 101), ("Bob", "green", 102)], game_time=300)
+    sup.add_arena("south", recv_port=7601, send_port=7600, roster=[...])
+    sup.start_arena("north")
+    sup.scores("north")      # {"arena", "running", "time_left", "totals", "players"}
+    sup.all_scores()
+    sup.stop_arena("north")
+    sup.shutdown()
+
+Inside a worker every arena gets an engine.EventPump thread standing in
+for the UI (woken by on_events_ready, then process_pending_events()).
+
+CLI:
+    python arena_supervisor.py --arena north:7501:7500:north.csv \\
+                               --arena south:7601:7600:south.csv --game-time 300
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+from hwid_alloc import TEAMS
+
+
+# ---------------------------
+# Worker process side
+# ---------------------------
+class _Arena:
+    """One engine plus the EventPump thread that applies its events."""
+
+    def __init__(self, name: str, config: dict):
+        from engine import LOG_TEMPLATES
+        from event_log import EventLogger, WARNING
+
+        self.name = name
+        log = EventLogger(f"arena-{name}", level=config.get("log_level", WARNING))
+        log.register_templates(LOG_TEMPLATES)
+        if config.get("log_path"):
+            log.set_sink(config["log_path"])
+
+        kwargs = dict(ip=config.get("ip", "127.0.0.1"), send_port=config["send_port"],
+                      recv_port=config["recv_port"], game_time=config.get("game_time", 300),
+                      log=log, journal_path=config.get("journal_path"),
+                      team_policy=config.get("team_policy", "alternate"))
+        if config.get("asyncio"):
+            from engine_async import AsyncGameEngine
+            self.engine = AsyncGameEngine(**kwargs)
+        else:
+            from engine import GameEngine
+            self.engine = GameEngine(**kwargs)
+        from engine import EventPump
+        for codename, team, player_id in config.get("roster", ()):
+            self.engine.join_player(codename, team, player_id=player_id)
+
+        self._pump = EventPump(self.engine)
+        self._pump.start(f"arena-{name}")
+
+    def start(self):
+        self.engine.start_game()
+
+    def stop(self):
+        self.engine.stop_game()
+        self._pump.wake()
+
+    def close(self):
+        self.stop()
+        self._pump.stop(timeout=2.0)
+        self.engine.process_pending_events()
+        self.engine.log.close()
+
+    def scores(self) -> dict:
+        engine = self.engine
+        return {
+            "arena": self.name,
+            "running": engine.running,
+            "time_left": engine.time_left,
+            "totals": {team: engine.team_total(team) for team in TEAMS},
+            "players": [{"hw_id": p.hw_id, "username": p.username, "team": p.team,
+                         "score": p.score, "rank": engine.player_rank(p.hw_id)}
+                        for p in engine.top_players(None)],          # best first
+        }
+
+
+def _worker_main(conn):
+    """Command loop of one pool worker: (command, arena, payload) -> (ok, result)."""
+    arenas: dict[str, _Arena] = {}
+    while True:
+        try:
+            command, name, payload = conn.recv()
+        except EOFError:
+            command, name, payload = "shutdown", None, None
+        try:
+            if command == "shutdown":
+                for arena in arenas.values():
+                    arena.close()
+                arenas.clear()
+                break
+            if command == "add":
+                arenas[name] = _Arena(name, payload)
+                result = None
+            else:
+                arena = arenas[name]
+                if command == "start":
+                    arena.start()
+                    result = None
+                elif command == "stop":
+                    arena.stop()
+                    result = arena.scores()
+                elif command == "scores":
+                    result = arena.scores()
+                elif command == "remove":
+                    arena.close()
+                    del arenas[name]
+                    result = None
+                else:
+                    raise ValueError(f"unknown command {command!r}")
+        except Exception as e:
+            conn.send((False, f"{type(e).__name__}: {e}"))
+        else:
+            conn.send((True, result))
+    try:
+        conn.send((True, None))
+    except (OSError, EOFError):
+        pass
+    conn.close()
+
+
+# ---------------------------
+# Supervisor side
+# ---------------------------
+class _Worker:
+    def __init__(self, ctx, index: int):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child,), daemon=True,
+                                   name=f"arena-worker-{index}")
+        self.process.start()
+        child.close()
+        self.lock = threading.Lock()
+        self.arenas: set[str] = set()
+
+    def call(self, command: str, name, payload=None):
+        with self.lock:
+            self.conn.send((command, name, payload))
+            ok, result = self.conn.recv()
+        if not ok:
+            raise RuntimeError(f"arena {name}: {result}")
+        return result
+
+
+class ArenaSupervisor:
+    def __init__(self, workers: int | None = None):
+        ctx = multiprocessing.get_context("spawn")   # don't fork UI / logger threads
+        count = max(1, workers or os.cpu_count() or 1)
+        self._workers = [_Worker(ctx, i) for i in range(count)]
+        self._arena_worker: dict[str, _Worker] = {}
+        self._ports: dict[str, int] = {}             # arena -> recv_port
+
+    @property
+    def arenas(self) -> list[str]:
+        return list(self._arena_worker)
+
+    def add_arena(self, name: str, recv_port: int, send_port: int, roster=(),
+                  game_time: int = 300, ip: str = "127.0.0.1", asyncio: bool = False,
+                  journal_path: str | None = None, log_path: str | None = None,
+                  log_level: int | None = None, team_policy: str = "alternate"):
+        """Create an arena (engine + roster) on the least-loaded worker; not started yet."""
+        if name in self._arena_worker:
+            raise ValueError(f"arena {name!r} already exists")
+        for other, port in self._ports.items():
+            if port == recv_port:
+                raise ValueError(f"recv_port {recv_port} already used by arena {other!r}")
+
+        # (codename, team[, player_id]) -> always three, so results keep the id
+        roster = [(entry[0], entry[1], entry[2] if len(entry) > 2 else None) for entry in roster]
+        config = {"recv_port": recv_port, "send_port": send_port, "game_time": game_time,
+                  "ip": ip, "asyncio": asyncio, "journal_path": journal_path,
+                  "log_path": log_path, "team_policy": team_policy, "roster": roster}
+        if log_level is not None:
+            config["log_level"] = log_level
+
+        worker = min(self._workers, key=lambda w: len(w.arenas))
+        worker.call("add", name, config)
+        worker.arenas.add(name)
+        self._arena_worker[name] = worker
+        self._ports[name] = recv_port
+
+    def start_arena(self, name: str):
+        self._worker(name).call("start", name)
+
+    def stop_arena(self, name: str) -> dict:
+        """Stop the match (221 x3) and return its final scores."""
+        return self._worker(name).call("stop", name)
+
+    def remove_arena(self, name: str):
+        worker = self._worker(name)
+        worker.call("remove", name)
+        worker.arenas.discard(name)
+        del self._arena_worker[name]
+        del self._ports[name]
+
+    def scores(self, name: str) -> dict:
+        return self._worker(name).call("scores", name)
+
+    def all_scores(self) -> dict[str, dict]:
+        return {name: self.scores(name) for name in self._arena_worker}
+
+    def start_all(self):
+        for name in self._arena_worker:
+            self.start_arena(name)
+
+    def shutdown(self):
+        """Stop every arena and the worker processes."""
+        for worker in self._workers:
+            try:
+                worker.call("shutdown", None)
+            except (OSError, EOFError, RuntimeError):
+                pass
+            worker.process.join(timeout=5.0)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self._workers = []
+        self._arena_worker.clear()
+        self._ports.clear()
+
+    def _worker(self, name: str) -> _Worker:
+        worker = self._arena_worker.get(name)
+        if worker is None:
+            raise KeyError(f"no arena named {name!r}")
+        return worker
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run several Photon arenas concurrently.")
+    parser.add_argument("--arena", action="append", required=True,
+                        metavar="NAME:RECV_PORT:SEND_PORT:ROSTER",
+                        help="arena spec; ROSTER is a CSV as for headless.py (repeatable)")
+    parser.add_argument("--game-time", type=int, default=300)
+    parser.add_argument("--ip", default="127.0.0.1")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: cores)")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between score reports")
+    parser.add_argument("--asyncio", action="store_true", help="use the asyncio engine")
+    args = parser.parse_args(argv)
+
+    from roster_csv import read_roster_csv
+
+    specs = []
+    for spec in args.arena:
+        try:
+            name, recv_port, send_port, roster_path = spec.split(":", 3)
+            specs.append((name, int(recv_port), int(send_port), roster_path))
+        except ValueError:
+            parser.error(f"bad --arena spec {spec!r}")
+
+    sup = ArenaSupervisor(workers=min(args.workers or os.cpu_count() or 1, len(specs)))
+    try:
+        for name, recv_port, send_port, roster_path in specs:
+            roster, errors = read_roster_csv(roster_path)
+            for line_no, text in errors:
+                print(f"[arenas] {name}: skipped line {line_no}: {text}", file=sys.stderr)
+            sup.add_arena(name, recv_port, send_port, roster, game_time=args.game_time,
+                          ip=args.ip, asyncio=args.asyncio)
+        sup.start_all()
+        print(f"[arenas] started {', '.join(sup.arenas)}")
+
+        while True:
+            time.sleep(args.interval)
+            scores = sup.all_scores()
+            for s in scores.values():
+                print(f"[arenas] {s['arena']}: {s['time_left']}s left, "
+                      f"red={s['totals']['red']} green={s['totals']['green']}")
+            if not any(s["running"] for s in scores.values()):
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        final = {}
+        for name in sup.arenas:
+            try:
+                final[name] = sup.stop_arena(name)
+            except RuntimeError as e:
+                print(f"[arenas] {e}", file=sys.stderr)
+        sup.shutdown()
+    print(json.dumps(final, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
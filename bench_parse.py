@@ -0,0 +1,90 @@
+"""
+bench_parse.py
+--------------
+Microbenchmark: hit-packet parsing, string path vs bytes path.
+
+- decode/split:  what _listen_loop did per packet -- decode to str, strip,
+                 check for ':', split, strip both halves -- and then the two
+                 dict lookups _apply_hit did by string
+- resolved:      udp_ingest.parse_batch_resolved() -- partition raw bytes and
+                 resolve attacker/target to player slots / base codes before
+                 queuing, so the scorer only sees small ints
+
+Usage:
+    python bench_parse.py [--players 40] [--packets 100000] [--repeat 5]
+"""
+
+import argparse
+import random
+import time
+
+from udp_ingest import parse_batch_resolved
+from engine import BASE_CODES
+
+
+def legacy_parse(packets, players):
+    """The original per-packet decode/split path, plus the scorer's string lookups."""
+    events = []
+    for data in packets:
+        msg = data.decode(errors="ignore").strip()
+        if not msg:
+            continue
+        if ":" not in msg:
+            continue
+        attacker, target = msg.split(":", 1)
+        attacker = attacker.strip()
+        target   = target.strip()
+        if attacker and target:
+            a = players.get(attacker)
+            if a is None:
+                continue
+            if target == "43" or target == "53":
+                events.append((a, target))
+                continue
+            t = players.get(target)
+            if t is not None:
+                events.append((a, t))
+    return events
+
+
+def make_packets(n_players, n_packets, seed=1):
+    rng = random.Random(seed)
+    ids = [f"hw0x{i:04x}" for i in range(1, n_players + 1)]
+    targets = ids + ["43", "53"]
+    packets = [f"{rng.choice(ids)}:{rng.choice(targets)}".encode() for _ in range(n_packets)]
+    return ids, packets
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare hit-packet parse paths.")
+    parser.add_argument("--players", type=int, default=40)
+    parser.add_argument("--packets", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    ids, packets = make_packets(args.players, args.packets)
+    by_str   = {hw_id: slot for slot, hw_id in enumerate(ids)}
+    by_bytes = {hw_id.encode(): slot for slot, hw_id in enumerate(ids)}
+
+    t_legacy = best_of(lambda: legacy_parse(packets, by_str), args.repeat)
+    t_fast   = best_of(lambda: parse_batch_resolved(packets, by_bytes, BASE_CODES), args.repeat)
+
+    n = len(packets)
+    print(f"packets         {n}  ({args.players} players, best of {args.repeat})")
+    print(f"decode/split    {t_legacy * 1e9 / n:8.1f} ns/packet  {n / t_legacy:12,.0f} packets/s")
+    print(f"resolved bytes  {t_fast * 1e9 / n:8.1f} ns/packet  {n / t_fast:12,.0f} packets/s")
+    print(f"speedup         {t_legacy / t_fast:8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,199 @@
+"""
+bounded_queue.py
+----------------
+Capacity-limited replacement for queue.Queue with an explicit overload
+policy and counters for everything it sheds.
+
+Same calls the engine already makes on queue.Queue (put, get, get_nowait,
+qsize, empty; raises queue.Empty), plus:
+
+- capacity    limit in units of weight(item) (default 1 per item; the
+              engine's event_queue weighs a batch by its number of hits)
+- policy      what put() does when the queue is full:
+    "block"        wait for room (up to block_timeout, then drop the new item)
+    "drop-oldest"  discard queued items from the front until it fits
+    "drop-newest"  discard the item being put
+    "coalesce"     call coalesce(queued + [new]) to merge them (e.g. one
+                   pending hit per attacker), then drop-oldest if that
+                   still isn't enough
+- protect     predicate for items that are always admitted, over capacity
+              if need be (control codes)
+- on_drop     called once per queued item discarded (with the item) or
+              merged away (with None), e.g. to keep side tables in step
+
+stats() reports depth, shed counts per policy and the high-water mark.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+
+POLICIES = ("block", "drop-oldest", "drop-newest", "coalesce")
+
+
+class BoundedQueue:
+    def __init__(self, capacity: int, policy: str = "drop-oldest", weight=None,
+                 coalesce=None, protect=None, on_drop=None, block_timeout: float = 1.0):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown overload policy {policy!r} (choose from {', '.join(POLICIES)})")
+        if policy == "coalesce" and coalesce is None:
+            raise ValueError("coalesce policy needs a coalesce function")
+        self.capacity = capacity          # <= 0: unbounded
+        self.policy   = policy
+        self.block_timeout = block_timeout
+        self._weight   = weight
+        self._coalesce = coalesce
+        self._protect  = protect
+        self._on_drop  = on_drop
+
+        self._items: deque = deque()
+        self._size = 0                    # sum of weights queued
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full  = threading.Condition(self._lock)
+
+        # Accounting (in weight units)
+        self.accepted       = 0
+        self.dropped_oldest = 0
+        self.dropped_newest = 0
+        self.coalesced      = 0
+        self.blocked        = 0           # puts that had to wait for room
+        self.high_water     = 0
+
+    # ---------------------------
+    # queue.Queue-compatible API
+    # ---------------------------
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def put(self, item, block: bool = True, timeout: float | None = None) -> bool:
+        """Queue item under the overload policy. Returns False if it was shed.
+
+        block=False turns "block" into "drop-newest" for this call; timeout
+        overrides block_timeout.
+        """
+        w = self._weight(item) if self._weight is not None else 1
+        with self._lock:
+            if (self.capacity > 0 and self._size + w > self.capacity
+                    and not (self._protect is not None and self._protect(item))):
+                if self.policy == "coalesce":
+                    self._coalesce_with(item, w)
+                    return True
+                if not self._make_room(w, block, timeout):
+                    self.dropped_newest += w
+                    return False
+            self._append(item, w)
+        return True
+
+    def get(self, block: bool = True, timeout: float | None = None):
+        with self._not_empty:
+            if not block:
+                if not self._items:
+                    raise queue.Empty
+            elif timeout is None:
+                while not self._items:
+                    self._not_empty.wait()
+            else:
+                deadline = time.monotonic() + timeout
+                while not self._items:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise queue.Empty
+                    self._not_empty.wait(remaining)
+            item = self._items.popleft()
+            self._size -= self._weight(item) if self._weight is not None else 1
+            self._not_full.notify()
+            return item
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    # ---------------------------
+    # Diagnostics
+    # ---------------------------
+    @property
+    def shed(self) -> int:
+        return self.dropped_oldest + self.dropped_newest + self.coalesced
+
+    def stats(self) -> dict:
+        return {
+            "policy": self.policy,
+            "capacity": self.capacity,
+            "depth": self._size,
+            "high_water": self.high_water,
+            "accepted": self.accepted,
+            "dropped_oldest": self.dropped_oldest,
+            "dropped_newest": self.dropped_newest,
+            "coalesced": self.coalesced,
+            "blocked": self.blocked,
+            "shed": self.shed,
+        }
+
+    # ---------------------------
+    # Overload handling (lock held)
+    # ---------------------------
+    def _append(self, item, w: int):
+        self._items.append(item)
+        self._size += w
+        self.accepted += w
+        if self._size > self.high_water:
+            self.high_water = self._size
+        self._not_empty.notify()
+
+    def _make_room(self, w: int, block: bool, timeout: float | None) -> bool:
+        """Apply the policy until w more fits. False = shed the new item instead."""
+        policy = self.policy
+        if policy == "drop-newest" or (policy == "block" and not block):
+            return False
+
+        if policy == "block":
+            self.blocked += 1
+            deadline = time.monotonic() + (self.block_timeout if timeout is None else timeout)
+            while self._size + w > self.capacity:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._not_full.wait(remaining)
+            return True
+
+        return self._drop_oldest(w)
+
+    def _coalesce_with(self, item, w: int):
+        """Merge the queued items and the new one; drop-oldest if still over."""
+        queued = len(self._items)
+        before = self._size + w
+        merged = self._coalesce(list(self._items) + [item])
+        weight = self._weight
+        self._items = deque(merged)
+        self._size = sum(weight(i) for i in merged) if weight is not None else len(merged)
+        self.accepted += w
+        self.coalesced += before - self._size
+        if self._on_drop is not None:
+            for _ in range(queued + 1 - len(merged)):
+                self._on_drop(None)
+        if self._size > self.capacity:
+            self._drop_oldest(0)
+        if self._size > self.high_water:
+            self.high_water = self._size
+        self._not_empty.notify()
+
+    def _drop_oldest(self, w: int) -> bool:
+        """Evict from the front until w more fits; protected items stay."""
+        items = self._items
+        kept = []
+        while items and self._size + w > self.capacity:
+            old = items.popleft()
+            if self._protect is not None and self._protect(old):
+                kept.append(old)
+                continue
+            ow = self._weight(old) if self._weight is not None else 1
+            self._size -= ow
+            self.dropped_oldest += ow
+            if self._on_drop is not None:
+                self._on_drop(old)
+        items.extendleft(reversed(kept))
+        return self._size + w <= self.capacity
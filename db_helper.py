@@ -2,11 +2,32 @@
 db_helper.py
 ------------
 PostgreSQL helper for Photon project.
-Stores permanent list of players (id + codename).
-Scores/teams/hardware IDs are managed in-engine only.
+Stores permanent list of players (id + codename), and match history
+(matches, per-player results, optional per-hit events) written after
+each game by match_history.ResultWriter. Live scores/teams/hardware IDs
+are managed in-engine only.
+
+Connections come from a shared, thread-safe pool instead of one
+psycopg2.connect() per call:
+- Pool size is configurable (DB_POOL or init_pool()).
+- Connections idle longer than HEALTH_CHECK_IDLE are pinged before use.
+- A call that hits a dropped connection discards it and retries once on a
+  fresh one.
+- Hot lookups (by id / by codename) use server-side prepared statements,
+  prepared once per pooled connection.
 """
 
+import csv
+import io
+import time
+from contextlib import contextmanager
+
 import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+import psycopg2.pool
+
+import roster_csv
 
 # Adjust connection parameters to your VM setup
 DB_CONFIG = {
@@ -17,47 +38,189 @@ DB_CONFIG = {
     # "port": 5432,
 }
 
+# Connection pool sizing (override with init_pool(minconn=..., maxconn=...))
+DB_POOL = {
+    "minconn": 1,
+    "maxconn": 8,
+}
+
+HEALTH_CHECK_IDLE = 30.0   # seconds idle before a pooled connection is pinged
+
+INSERT_PAGE_SIZE = 1000    # rows per multi-row INSERT in save_match()
+
+# Server-side prepared statements for the hot lookups: name -> (arg types, SQL)
+PREPARED_STATEMENTS = {
+    "photon_player_by_id":   ("integer", "SELECT id, codename FROM players WHERE id = $1"),
+    "photon_player_by_name": ("text",    "SELECT id, codename FROM players WHERE codename = $1"),
+}
+
+_pool = None
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that remembers its prepared statements and last use."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self.last_used = time.monotonic()
+
 
 def get_connection():
+    """Open a standalone (unpooled) connection."""
     return psycopg2.connect(**DB_CONFIG)
 
 
+# ---------------------------
+# Pool management
+# ---------------------------
+def init_pool(minconn=None, maxconn=None):
+    """(Re)create the connection pool. Called lazily on first use."""
+    global _pool
+    close_pool()
+    _pool = psycopg2.pool.ThreadedConnectionPool(
+        DB_POOL["minconn"] if minconn is None else minconn,
+        DB_POOL["maxconn"] if maxconn is None else maxconn,
+        connection_factory=PooledConnection,
+        **DB_CONFIG,
+    )
+    return _pool
+
+
+def close_pool():
+    """Close every pooled connection."""
+    global _pool
+    if _pool is not None:
+        _pool.closeall()
+        _pool = None
+
+
+def _checkout():
+    pool = _pool or init_pool()
+    conn = pool.getconn()
+    try:
+        if conn.closed:
+            pool.putconn(conn, close=True)
+            conn = None
+            conn = pool.getconn()
+        # Single statements commit on their own; transaction() turns this off.
+        # Set before the ping so the ping never opens a transaction itself.
+        conn.autocommit = True
+        if time.monotonic() - getattr(conn, "last_used", 0.0) > HEALTH_CHECK_IDLE:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1;")
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                pool.putconn(conn, close=True)
+                conn = None
+                conn = pool.getconn()
+                conn.autocommit = True
+    except Exception:
+        if conn is not None:
+            pool.putconn(conn, close=True)  # never leak a connection we couldn't prepare
+        raise
+    return conn
+
+
+def _checkin(conn, broken=False):
+    if _pool is None:
+        conn.close()
+        return
+    if not broken:
+        conn.last_used = time.monotonic()
+    _pool.putconn(conn, close=broken or conn.closed)
+
+
+def _run(work, retry: bool = False):
+    """Run work(conn, cur) on a pooled connection.
+
+    retry=True runs it once more on a fresh connection if the first one
+    dropped. Only pass it for work that is safe to repeat (reads, IF NOT
+    EXISTS DDL): a write may have committed before the connection died, and
+    running it again would fail with a duplicate key or apply twice.
+    """
+    for attempt in range(2 if retry else 1):
+        conn = _checkout()
+        try:
+            with conn.cursor() as cur:
+                result = work(conn, cur)
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            _checkin(conn, broken=True)
+            if attempt or not retry:
+                raise
+            continue
+        except Exception:
+            _checkin(conn, broken=conn.closed)
+            raise
+        _checkin(conn)
+        return result
+
+
+@contextmanager
+def transaction():
+    """Pooled cursor inside one transaction (commit on success, rollback on error)."""
+    conn = _checkout()
+    conn.autocommit = False
+    try:
+        with conn.cursor() as cur:
+            yield cur
+        conn.commit()
+        conn.autocommit = True              # back in the pool as a single-statement connection
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        _checkin(conn, broken=True)
+        raise
+    except Exception:
+        if not conn.closed:
+            conn.rollback()
+            conn.autocommit = True
+        _checkin(conn, broken=conn.closed)
+        raise
+    else:
+        _checkin(conn)
+
+
+def _execute_prepared(conn, cur, name, args):
+    if name not in conn.prepared:
+        arg_types, sql = PREPARED_STATEMENTS[name]
+        cur.execute(f"PREPARE {name} ({arg_types}) AS {sql};")
+        conn.prepared.add(name)
+    placeholders = ", ".join(["%s"] * len(args))
+    cur.execute(f"EXECUTE {name} ({placeholders});", args)
+
+
+# ---------------------------
+# Players table
+# ---------------------------
 def init_db():
     """Ensure the players table exists."""
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS players (
-            id integer PRIMARY KEY,
-            codename varchar(255) NOT NULL
-        );
-        """
-    )
-    conn.commit()
-    cur.close()
-    conn.close()
+    def work(conn, cur):
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS players (
+                id integer PRIMARY KEY,
+                codename varchar(255) NOT NULL
+            );
+            """
+        )
+        # Earlier versions indexed codename prefixes; roster_cache answers searches now
+        cur.execute("DROP INDEX IF EXISTS players_codename_prefix_idx;")
+    _run(work, retry=True)
 
 
 def add_player(player_id: int, codename: str) -> bool:
-	
-    conn = get_connection()
-    cur = conn.cursor()
-    
-    try:
+
+    def work(conn, cur):
         cur.execute(
             "INSERT INTO players (id, codename) VALUES (%s, %s);",
             (player_id, codename),
         )
-        conn.commit()
+
+    try:
+        _run(work)
         success = True
     except psycopg2.Error as e:
         print(f"[db_helper] add_player error: {e}")
-        conn.rollback()
         success = False
-    finally:
-        cur.close()
-        conn.close()
 
     return success
 
@@ -67,15 +230,10 @@ def search_player(player_id: int):
     Look up a player by ID.
     Returns dict {id, codename} or None.
     """
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT id, codename FROM players WHERE id = %s;",
-        (player_id,),
-    )
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
+    def work(conn, cur):
+        _execute_prepared(conn, cur, "photon_player_by_id", (player_id,))
+        return cur.fetchone()
+    row = _run(work, retry=True)
 
     if row:
         return {"id": row[0], "codename": row[1]}
@@ -87,15 +245,10 @@ def get_player_by_name(codename: str):
     Look up a player by codename.
     Returns dict {id, codename} or None.
     """
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT id, codename FROM players WHERE codename = %s;",
-        (codename,),
-    )
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
+    def work(conn, cur):
+        _execute_prepared(conn, cur, "photon_player_by_name", (codename,))
+        return cur.fetchone()
+    row = _run(work, retry=True)
 
     if row:
         return {"id": row[0], "codename": row[1]}
@@ -104,9 +257,247 @@ def get_player_by_name(codename: str):
 
 def delete_player(player_id: int) -> None:
     """Delete a player by ID."""
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM players WHERE id = %s;", (player_id,))
-    conn.commit()
-    cur.close()
-    conn.close()
+    def work(conn, cur):
+        cur.execute("DELETE FROM players WHERE id = %s;", (player_id,))
+    _run(work)
+
+
+def fetch_all_players():
+    """Return every (id, codename) row in one query (roster preload)."""
+    def work(conn, cur):
+        cur.execute("SELECT id, codename FROM players;")
+        return cur.fetchall()
+    return _run(work, retry=True)
+
+
+# ---------------------------
+# Bulk roster import / export
+# ---------------------------
+def import_players(rows, overwrite: bool = True) -> dict:
+    """
+    Bulk upsert (id, codename) rows in one transaction.
+
+    Rows are streamed into a temp table with COPY, then merged with a single
+    INSERT ... ON CONFLICT (id). overwrite=True updates codenames of existing
+    ids; overwrite=False keeps the stored codename.
+
+    Returns a report dict:
+        rows       -- rows given
+        duplicates -- rows dropped because a later row had the same id
+        inserted   -- new ids
+        updated    -- existing ids whose codename changed
+        unchanged  -- existing ids left as they were
+        conflicts  -- [(id, stored_codename, incoming_codename), ...]
+    """
+    rows = list(rows)
+    latest = {}
+    for player_id, codename in rows:
+        latest[int(player_id)] = codename      # last occurrence of an id wins
+
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerows(latest.items())
+    buf.seek(0)
+
+    with transaction() as cur:
+        cur.execute(
+            "CREATE TEMP TABLE players_import (id integer PRIMARY KEY, codename varchar(255) NOT NULL) "
+            "ON COMMIT DROP;"
+        )
+        cur.copy_expert("COPY players_import (id, codename) FROM STDIN WITH (FORMAT csv);", buf)
+
+        cur.execute(
+            """
+            SELECT p.id, p.codename, i.codename
+            FROM players p JOIN players_import i USING (id)
+            WHERE p.codename IS DISTINCT FROM i.codename
+            ORDER BY p.id;
+            """
+        )
+        conflicts = cur.fetchall()
+
+        action = (
+            "DO UPDATE SET codename = EXCLUDED.codename "
+            "WHERE players.codename IS DISTINCT FROM EXCLUDED.codename"
+            if overwrite else "DO NOTHING"
+        )
+        cur.execute(
+            f"""
+            INSERT INTO players (id, codename)
+            SELECT id, codename FROM players_import
+            ON CONFLICT (id) {action}
+            RETURNING (xmax = 0) AS inserted;
+            """
+        )
+        written = cur.fetchall()
+
+    inserted = sum(1 for (was_insert,) in written if was_insert)
+    updated  = len(written) - inserted
+    return {
+        "rows": len(rows),
+        "duplicates": len(rows) - len(latest),
+        "inserted": inserted,
+        "updated": updated,
+        "unchanged": len(latest) - inserted - updated,
+        "conflicts": conflicts,
+    }
+
+
+def export_players(out) -> int:
+    """Write the players table as CSV (with header) to a text file object via COPY."""
+    def work(conn, cur):
+        cur.copy_expert(
+            "COPY (SELECT id, codename FROM players ORDER BY id) TO STDOUT WITH (FORMAT csv, HEADER);",
+            out,
+        )
+        return cur.rowcount
+    return _run(work)
+
+
+# ---------------------------
+# Match history
+# ---------------------------
+HISTORY_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS matches (
+        id bigserial PRIMARY KEY,
+        started_at timestamptz,
+        ended_at timestamptz NOT NULL,
+        game_time integer NOT NULL,
+        red_total integer NOT NULL,
+        green_total integer NOT NULL,
+        winner varchar(16)
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS match_results (
+        match_id bigint NOT NULL REFERENCES matches (id) ON DELETE CASCADE,
+        hw_id varchar(16) NOT NULL,
+        player_id integer,
+        codename varchar(255) NOT NULL,
+        team varchar(16) NOT NULL,
+        score integer NOT NULL,
+        hits integer NOT NULL,
+        hits_dealt integer NOT NULL,
+        hits_taken integer NOT NULL,
+        base_captures integer NOT NULL,
+        friendly_fire integer NOT NULL,
+        longest_streak integer NOT NULL,
+        last_hit timestamptz,
+        PRIMARY KEY (match_id, hw_id)
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS match_events (
+        match_id bigint NOT NULL REFERENCES matches (id) ON DELETE CASCADE,
+        seq integer NOT NULL,
+        t_ms integer NOT NULL,
+        attacker varchar(16) NOT NULL,
+        target varchar(16) NOT NULL,
+        kind varchar(16) NOT NULL,
+        points integer NOT NULL,
+        PRIMARY KEY (match_id, seq)
+    );
+    """,
+    # History lookups: a player's matches newest first, recent matches by time
+    "CREATE INDEX IF NOT EXISTS match_results_player_idx ON match_results (player_id, match_id DESC);",
+    "CREATE INDEX IF NOT EXISTS matches_ended_at_idx ON matches (ended_at DESC);",
+)
+
+
+def init_history_tables():
+    """Ensure the matches / match_results / match_events tables and indexes exist."""
+    def work(conn, cur):
+        for statement in HISTORY_SCHEMA:
+            cur.execute(statement)
+    _run(work, retry=True)
+
+
+def save_match(summary: dict, events=None) -> int:
+    """
+    Write one match_history.match_summary() (and optional event rows) in a
+    single transaction. Returns the new match id.
+
+    Result rows go in multi-row INSERTs (INSERT_PAGE_SIZE per statement);
+    events are streamed with COPY.
+    """
+    totals = summary["totals"]
+    red, green = totals.get("red", 0), totals.get("green", 0)
+    winner = "red" if red > green else "green" if green > red else None
+
+    with transaction() as cur:
+        cur.execute(
+            """
+            INSERT INTO matches (started_at, ended_at, game_time, red_total, green_total, winner)
+            VALUES (to_timestamp(%s), to_timestamp(%s), %s, %s, %s, %s)
+            RETURNING id;
+            """,
+            (summary["started_at"], summary["ended_at"], summary["game_time"], red, green, winner),
+        )
+        match_id = cur.fetchone()[0]
+
+        psycopg2.extras.execute_values(
+            cur,
+            """
+            INSERT INTO match_results (match_id, hw_id, player_id, codename, team, score, hits,
+                                       hits_dealt, hits_taken, base_captures, friendly_fire,
+                                       longest_streak, last_hit)
+            VALUES %s;
+            """,
+            [(match_id, p["hw_id"], p["player_id"], p["username"], p["team"], p["score"], p["hits"],
+              p["hits_dealt"], p["hits_taken"], p["base_captures"], p["friendly_fire"],
+              p["longest_streak"], p["last_hit"] or None)
+             for p in summary["players"]],
+            template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, to_timestamp(%s))",
+            page_size=INSERT_PAGE_SIZE,
+        )
+
+        if events:
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerows((match_id,) + tuple(event) for event in events)
+            buf.seek(0)
+            cur.copy_expert(
+                "COPY match_events (match_id, seq, t_ms, attacker, target, kind, points) "
+                "FROM STDIN WITH (FORMAT csv);",
+                buf,
+            )
+    return match_id
+
+
+def fetch_player_history(player_id: int, limit: int = 20):
+    """A player's most recent results: (match_id, ended_at, team, score, hits_dealt, hits_taken) rows."""
+    def work(conn, cur):
+        cur.execute(
+            """
+            SELECT r.match_id, m.ended_at, r.team, r.score, r.hits_dealt, r.hits_taken
+            FROM match_results r JOIN matches m ON m.id = r.match_id
+            WHERE r.player_id = %s
+            ORDER BY r.match_id DESC
+            LIMIT %s;
+            """,
+            (player_id, limit),
+        )
+        return cur.fetchall()
+    return _run(work, retry=True)
+
+
+def fetch_recent_matches(limit: int = 20):
+    """Latest matches: (id, ended_at, red_total, green_total, winner) rows."""
+    def work(conn, cur):
+        cur.execute(
+            "SELECT id, ended_at, red_total, green_total, winner FROM matches "
+            "ORDER BY ended_at DESC LIMIT %s;",
+            (limit,),
+        )
+        return cur.fetchall()
+    return _run(work, retry=True)
+
+
+def read_roster_csv(path: str):
+    """
+    Read (id, codename) rows from a roster CSV (roster_csv format; a header
+    row is skipped). Returns (rows, errors) where errors is [(line_no, text), ...].
+    """
+    roster, errors = roster_csv.read_roster_csv(path, require_id=True)
+    return [(player_id, codename) for codename, _, player_id in roster], errors
@@ -5,24 +5,53 @@ Photon game engine aligned to the teacher's traffic generator.
 
 Protocol alignment:
 - Start code: plain "202" sent ~3s after start_game()
-- Stop code: plain "221" sent 3x at game end
+- Stop code: plain "221" sent 3x at game end (0.1s apart)
 - Event format from generator: "ATTACKER:TARGET" (plain string, no JSON)
   * TARGET may be another hardware_id OR special codes "43" or "53"
 - Per-event acknowledgement: send a short plain string back each time (e.g., "OK")
 
 Data model (in-memory only):
 - Player keyed by hardware_id; tracks username, team, score
+- Hardware IDs come from a collision-free allocator (hwid_alloc.py); teams
+  from a pluggable balancing policy (alternate / least-count / least-score)
+- Scores live in a ScoreStore (typed arrays indexed by player slot) with
+  running team totals; Player.score reads through to it
+- Timing: one TimerWheel on time.monotonic(), run by the send thread, fires
+  the 202 delay, the once-a-second time_left tick, game end and the 221
+  burst; remaining() is exact (no sleep-and-decrement drift)
+- Optional binary match journal (match_journal.py): registrations, applied
+  hits and control codes, replayable into a fresh engine
+- Optional results writer (match_history.py): final standings are saved
+  to the database after the game stops, on a background thread
+- EventPump stands in for the UI's event loop (headless runs, arenas,
+  loadgen): wait for on_events_ready, then process_pending_events()
 
 Networking defaults (match generator v2):
 - Receive (hits) on port 7501
 - Send (acks / start / stop / join broadcasts) to port 7500 at self.ip
 """
 # Necessary Import Statements
+import math
 import threading
 import socket # UDP Sockets
 import queue
 import time
-import random
+import selectors
+import errno
+from array import array
+from typing import Callable
+
+from udp_ingest import open_recv_socket, drain, parse_batch_resolved, IngestStats
+from score_store import ScoreStore
+from instrumentation import EngineMetrics
+from udp_send import Coalescer, SendStats, DEFAULT_SEND_BATCH, NEVER_COALESCE, NEVER_COALESCE_PREFIX
+from event_log import EventLogger
+from match_journal import JournalWriter
+from timer_wheel import TimerWheel
+from hwid_alloc import HwIdAllocator, TeamBalancer
+from kill_feed import KillFeed, ENEMY_HIT, FRIENDLY_FIRE, BASE_43, BASE_53
+from bounded_queue import BoundedQueue
+from match_history import match_summary
 
 
 # ---- Scoring rules ----
@@ -30,46 +59,270 @@ NORMAL_HIT_POINTS = 10 # 10 Points for P2P combat
 BASE_43_POINTS    = 100 # 100 Points for Base 43
 BASE_53_POINTS    = 500 # 500 Points for Base 53
 
+# ---- Pre-resolved targets ----
+# The batched listener resolves IDs before queuing: attackers become player
+# slots, targets become a slot or one of these (negative) base codes.
+TARGET_BASE_43 = -43
+TARGET_BASE_53 = -53
+BASE_CODES = {b"43": TARGET_BASE_43, b"53": TARGET_BASE_53}
+
+# Codes recorded in the match journal when sent
+CONTROL_CODES = {"202", "221"}
+
+# ---- Control code timing ----
+START_CODE_DELAY = 3.0   # seconds between start_game() and "202"
+STOP_CODE_REPEAT = 3     # "221" is sent this many times...
+STOP_CODE_GAP    = 0.1   # ...this far apart
+STOP_SETTLE      = 0.1   # then this long before the threads wind down
+
+# Queue limits: event_queue counts hits (a batch weighs its number of hits),
+# send_queue counts lines. Overload policies are those of bounded_queue
+# ("block", "drop-oldest", "drop-newest", "coalesce"); 0 = unbounded.
+EVENT_QUEUE_CAPACITY = 100_000
+SEND_QUEUE_CAPACITY  = 100_000
+OVERLOAD_POLICY      = "drop-oldest"
+OVERLOAD_LOG_INTERVAL = 1.0   # seconds between queue_overload warnings
+
+# Put on send_queue to wake the send thread when a timer is scheduled
+# from another thread (never transmitted)
+_TIMER_WAKEUP = None
+
+
+# ---- Logging ----
+# Engine threads log structured records; the background writer formats them
+# with these templates (no string work on the scoring/network threads).
+LOG_TEMPLATES = {
+    "ip_changed":       "send target ip = {ip}",
+    "game_started":     "Game started.",
+    "game_stopped":     "Game stopped.",
+    "player_joined":    "Player joined: {username} ({hw_id}) [{team}]",
+    "player_removed":   "Player removed: {username} ({hw_id})",
+    "unknown_attacker": "Ignored event: unknown attacker '{attacker}'",
+    "unknown_target":   "Ignored event: unknown target '{target}'",
+    "base_43":          "Red base score! {attacker} +{points}",
+    "base_53":          "Green base score! {attacker} +{points}",
+    "friendly_fire":    "Friendly fire: {attacker} ({attacker_id}) hit {target} ({target_id}), -{points} each",
+    "enemy_hit":        "Enemy hit: {attacker} ({attacker_id}) hit {target} ({target_id}), +{points}",
+    "unknown_packet":   "Unknown packet (ignored): {msg}",
+    "bad_packet":       "Bad packet (ignored): {msg}",
+    "listen_error":     "Listen error: {error}",
+    "start_error":      "Start error: {error}",
+    "send_error":       "Send error: {error}",
+    "callback_error":   "Wakeup callback error: {error}",
+    "metrics_error":    "Metrics dump failed: {error}",
+    "journal_opened":   "Match journal: {path}",
+    "journal_error":    "Match journal error: {error}",
+    "timer_error":      "Timer callback error: {error}",
+    "results_saved":    "Match {match_id} saved: {players} players, {events} events",
+    "results_error":    "Saving match results failed: {error}",
+    "queue_overload":   "{queue} over capacity ({policy}): {shed} shed so far",
+}
+
+# Shared default logger for engines that aren't given their own
+engine_log = EventLogger("engine")
+engine_log.register_templates(LOG_TEMPLATES)
+
+
+# --- Queue policy helpers ---
+def _event_weight(item) -> int:
+    """Hits in one event_queue item (array of slot pairs, list of tuples, or one tuple)."""
+    if isinstance(item, array):
+        return len(item) // 2
+    if isinstance(item, list):
+        return len(item)
+    return 1
+
+
+def _coalesce_events(items: list) -> list:
+    """Keep only the latest pending hit per attacker, in one item of the newest kind."""
+    latest = {}
+    for item in items:
+        if isinstance(item, array):
+            it = iter(item)
+            for attacker, target in zip(it, it):
+                latest.pop(attacker, None)        # re-insert: order by latest hit
+                latest[attacker] = target
+        else:
+            for attacker, target in (item if isinstance(item, list) else (item,)):
+                latest.pop(attacker, None)
+                latest[attacker] = target
+    if not latest:
+        return []
+    if isinstance(items[-1], array):
+        merged = array("l")
+        for attacker, target in latest.items():
+            merged.append(attacker)
+            merged.append(target)
+        return [merged]
+    return [list(latest.items())]
+
+
+def _line_of(msg) -> str | None:
+    return msg[0] if isinstance(msg, tuple) else msg
+
+
+def _protected_line(msg) -> bool:
+    """Control codes, joins and timer wakeups are never shed from send_queue."""
+    line = _line_of(msg)
+    return line is _TIMER_WAKEUP or line in CONTROL_CODES or line.startswith("REG:")
+
+
+def _coalesce_lines(items: list) -> list:
+    """Drop repeats of a line already waiting (first copy keeps its place).
+
+    Protected lines and per-event replies (udp_send.NEVER_COALESCE: "OK",
+    "ERR:...") are never merged; one reply per event still holds.
+    """
+    seen = set()
+    kept = []
+    for msg in items:
+        line = _line_of(msg)
+        if (_protected_line(msg) or line in NEVER_COALESCE
+                or line.startswith(NEVER_COALESCE_PREFIX)):
+            kept.append(msg)
+        elif line not in seen:
+            seen.add(line)
+            kept.append(msg)
+    return kept
+
 
 # --- Basic player object ---
 class Player:
-    def __init__(self, hw_id: str, username: str, team: str):
+    def __init__(self, hw_id: str, username: str, team: str,
+                 store: ScoreStore | None = None, slot: int | None = None,
+                 player_id: int | None = None):
         self.hw_id   = hw_id       # hardware ID is the canonical in-game key
         self.username = username
         self.team     = team       # "red" or "green" (free-form string)
-        self.score    = 0
+        self.player_id = player_id # players-table id, when known (match history)
+
+        # Score lives in the engine's ScoreStore; a standalone Player gets its own
+        self._store = store if store is not None else ScoreStore(capacity=1)
+        self.slot   = slot if slot is not None else self._store.add(hw_id, team)
+
+    @property
+    def score(self) -> int:
+        return self._store.scores[self.slot]
+
+    @score.setter
+    def score(self, value: int):
+        self._store.set_score(self.slot, value)
+
+    @property
+    def stats(self) -> dict:
+        """Combat statistics (hits dealt/taken, base captures, streak, ...)."""
+        return self._store.stats(self.slot)
 
 
 # --- Main game engine ---
 class GameEngine:
-    def __init__(self, ip="127.0.0.1", send_port=7500, recv_port=7501, game_time=300):
+    def __init__(self, ip="127.0.0.1", send_port=7500, recv_port=7501, game_time=300,
+                 batch_ingest=True, metrics=False, metrics_path=None,
+                 send_batch=DEFAULT_SEND_BATCH, coalesce_window=0.0,
+                 log: EventLogger | None = None, journal_path=None, team_policy="alternate",
+                 event_queue_size=EVENT_QUEUE_CAPACITY, send_queue_size=SEND_QUEUE_CAPACITY,
+                 overload_policy=OVERLOAD_POLICY, send_overload_policy=None,
+                 results_writer=None):
+        # Structured logger (level-gated, written off-thread)
+        self.log = log if log is not None else engine_log
+
         # Active roster for the current match (keyed by hardware_id)
         self.players: dict[str, Player] = {}
 
-        # Game control
+        # Scores, teams and counters by player slot, plus O(1) team totals
+        self.scores = ScoreStore()
+        self.slot_players: list[Player | None] = []   # slot -> Player (None = free)
+
+        # Hardware IDs (O(1), never collide) and team placement for join_player()
+        self.hw_ids = HwIdAllocator()
+        self.team_balancer = TeamBalancer(team_policy)
+
+        # Game control: time_left is whole seconds (ticked by the scheduler);
+        # remaining() is exact against _end_at on the monotonic clock
+        self.game_time = game_time
         self.time_left = game_time
         self.running   = False
+        self.started_at: float | None = None    # wall clock, for match history
+        self.timers    = TimerWheel(on_error=lambda e: self.log.error("timer_error", error=e))
+        self._end_at: float | None = None
+        self._start_code_timer = None
+        self._stopping = False
+        self._stopped  = threading.Event()
+        self._shutdown_lock = threading.Lock()
+        self._finish_pending = False   # journal/results wait for the consumer's last drain
+        self._send_thread_id: int | None = None
 
         # Networking setup
         self.ip         = ip          # where we SEND (generator is listening on this host)
         self.send_port  = send_port   # generator receives on 7500
         self.recv_port  = recv_port   # we receive on 7501
 
-        # Queues (strings in send_queue; tuples (attacker, target) in event_queue)
-        self.event_queue: queue.Queue[tuple[str, str]] = queue.Queue()
-        self.send_queue:  queue.Queue[str]             = queue.Queue()
+        # Queues (strings in send_queue -- (line, queued_ns, origin_ns) tuples while
+        # metrics are on; event_queue holds (attacker, target) string tuples, or
+        # with batch_ingest one array('l') of attacker, target slot-reference pairs
+        # per wakeup). Both are bounded; what gets shed under overload is set
+        # by the policy and counted in queue_stats()
+        self.event_queue = BoundedQueue(event_queue_size, overload_policy,
+                                        weight=_event_weight, coalesce=_coalesce_events,
+                                        on_drop=self._event_dropped)
+        self.send_queue  = BoundedQueue(send_queue_size, send_overload_policy or overload_policy,
+                                        coalesce=_coalesce_lines, protect=_protected_line,
+                                        on_drop=self._line_dropped)
+        self._shed_logged = {"event_queue": 0, "send_queue": 0}
+        self._overload_logged_at = 0.0
+
+        # Ingest mode: drain every waiting datagram per wakeup vs. one recv per packet
+        self.batch_ingest = batch_ingest
+        self.ingest_stats = IngestStats()
+
+        # Outbound: up to send_batch datagrams per sender wakeup; a positive
+        # coalesce_window (seconds) suppresses repeated hit broadcasts
+        self.send_batch = max(1, send_batch)
+        self.coalescer  = Coalescer(coalesce_window) if coalesce_window > 0 else None
+        self.send_stats = SendStats()
+
+        # Optional per-stage latency metrics (None = off, zero overhead);
+        # dumped to metrics_path as JSON when the game stops
+        self.metrics: EngineMetrics | None = EngineMetrics() if metrics else None
+        self.metrics_path = metrics_path
+        self._ack_origin_ns = 0   # receive time of the batch being applied
+
+        # Optional append-only match journal, opened at start_game() when a
+        # path is set and closed after the stop codes (None = off)
+        self.journal_path = journal_path
+        self.journal: JournalWriter | None = None
+
+        # Optional match_history.ResultWriter: gets match_summary() once the
+        # game has stopped and saves it to the database in the background
+        self.results_writer = results_writer
+        if results_writer is not None and results_writer.log is None:
+            results_writer.log = self.log
 
         # Sockets
         self.recv_sock = None
         self.send_sock = None
 
+        # Change tracking for the UI: hw_ids whose score moved since the last
+        # take_dirty_players(), and a counter bumped on every join/remove
+        self.dirty_players: set[str] = set()
+        self.roster_version = 0
+
+        # Scoring events for the UI's kill feed (bounded; drained by the display)
+        self.kill_feed = KillFeed()
+
+        # Optional wakeup hook for the UI: called from the network thread when
+        # new events are queued. Coalesced: at most one call is outstanding
+        # until process_pending_events() runs, so a burst means one wakeup.
+        self.on_events_ready: Callable[[], None] | None = None
+        self._wakeup_pending = False
+
         # Internal thread refs (optional)
         self._threads: list[threading.Thread] = []
 
     # --- Change target IP for outgoing messages (before start) ---
     def change_ip(self, new_ip: str):
         self.ip = new_ip
-        print(f"[engine] send target ip = {self.ip}")
+        self.log.info("ip_changed", ip=self.ip)
 
     # ---------------------------
     # Public API
@@ -78,145 +331,388 @@ class GameEngine:
         """Start networking + game timer; emit start code '202' after ~3s."""
         if self.running:
             return
+        if self._finish_pending:
+            self.process_pending_events()   # previous match: last queued hits, journal, results
         self.running = True
+        self.started_at = time.time()
+        self._open_journal()
 
-        # setup sockets
-        self.recv_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.recv_sock.bind(("0.0.0.0", self.recv_port))
-        self.recv_sock.settimeout(1.0)
+        # setup sockets (non-blocking receive when draining in batches)
+        self.recv_sock = open_recv_socket(self.recv_port, blocking=not self.batch_ingest)
+        self.ingest_stats = IngestStats()
 
         self.send_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         # Broadcast not required for local generator, but harmless to keep:
         self.send_sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
 
-        # start listener + sender + timer threads
+        # schedule the start code, the clock and game end (run by the send thread)
+        self._stopping = False
+        self._stopped.clear()
+        self.timers.clear()
+        self._end_at = time.monotonic() + self.time_left
+        self._start_code_timer = self.timers.schedule(START_CODE_DELAY, self.send_code, "202")
+        self.timers.call_at(self._end_at, self._begin_stop)
+        self._schedule_clock_tick()
+
+        # start listener + sender threads
         self._start_thread(self._listen_loop, name="listen")
         self._start_thread(self._send_loop,   name="send")
-        self._start_thread(self._game_loop,   name="game")
 
-        # delayed start code on its own thread to avoid blocking UI
-        self._start_thread(self._delayed_start_code, name="start_code")
-
-        print("[engine] Game started.")
+        self.log.info("game_started")
 
     def stop_game(self):
-        """Send stop codes, halt threads, close sockets."""
+        """Send stop codes, halt threads, close sockets (returns once stopped)."""
         if not self.running:
             return
+        self._begin_stop()
+        if threading.get_ident() == self._send_thread_id:
+            return  # called from a timer callback; the send thread finishes the stop
 
-        # Send stop code (221) three times quickly
-        for _ in range(3):
-            self.send_code("221")
-            time.sleep(0.1)
+        wait = (STOP_CODE_REPEAT - 1) * STOP_CODE_GAP + STOP_SETTLE
+        if not self._stopped.wait(timeout=wait + 2.0):
+            # Send thread is gone (socket error); finish the shutdown here
+            self.running = False
+            self._shutdown()
 
-        # Flip running off; loops will end
-        self.running = False
+    def remaining(self) -> float:
+        """Exact seconds left in the match (monotonic clock); frozen once stopped."""
+        end_at = self._end_at
+        if end_at is None:
+            return float(self.time_left)
+        return max(0.0, end_at - time.monotonic())
 
-        # Give loops a moment to exit gracefully
-        time.sleep(0.2)
+    def call_later(self, delay: float, callback, *args):
+        """Run callback(*args) on the engine's send thread after delay seconds.
 
-        # Close sockets
-        try:
-            if self.recv_sock:
-                self.recv_sock.close()
-        finally:
-            self.recv_sock = None
+        Returns a handle for cancel_timer(). Callbacks should be quick: they
+        share the thread that transmits datagrams.
+        """
+        handle = self.timers.schedule(delay, callback, *args)
+        if self.running and threading.get_ident() != self._send_thread_id:
+            self.send_queue.put(_TIMER_WAKEUP)   # re-arm the send thread's wait
+        return handle
 
-        try:
-            if self.send_sock:
-                self.send_sock.close()
-        finally:
-            self.send_sock = None
+    def cancel_timer(self, handle):
+        self.timers.cancel(handle)
+
+    def _shutdown(self):
+        """Close sockets and metrics once the loops are done (runs once).
+
+        Hits can still be waiting on event_queue at this point, so the journal
+        and the saved results are finished by process_pending_events(), on the
+        thread that applies them (see _match_over).
+        """
+        with self._shutdown_lock:
+            if self._stopped.is_set():
+                return
+            self.running = False
+            self.time_left = math.ceil(self.remaining())
+            self._end_at = None
+            self.timers.clear()
+
+            if self.metrics is not None and self.metrics_path:
+                try:
+                    self.metrics.dump(self.metrics_path)
+                except OSError as e:
+                    self.log.error("metrics_error", error=e)
+
+            # Close sockets
+            try:
+                if self.recv_sock:
+                    self.recv_sock.close()
+            finally:
+                self.recv_sock = None
+
+            try:
+                if self.send_sock:
+                    self.send_sock.close()
+            finally:
+                self.send_sock = None
+
+            # Final shed counts if they moved since the last (throttled) warning
+            for name, queue_ in (("event_queue", self.event_queue), ("send_queue", self.send_queue)):
+                if queue_.shed != self._shed_logged[name]:
+                    self._report_overload(name, queue_, force=True)
+
+            self._stopped.set()
+            self.log.info("game_stopped")
+        self._match_over()
 
-        print("[engine] Game stopped.")
+    def _match_over(self):
+        """Network side is done: have the consumer apply what's left, then finish the match."""
+        self._finish_pending = True
+        self._notify_events()
+
+    def _finish_match(self):
+        """Close the journal and save results, after the last queued hit (consumer thread)."""
+        self._finish_pending = False
+        self._close_journal()
+        self._submit_results()
 
     def process_pending_events(self):
-        """Drain queued (attacker, target) tuples and apply to game state."""
-        while not self.event_queue.empty():
-            attacker, target = self.event_queue.get()
-            self._apply_hit(attacker, target)
+        """Drain queued (attacker, target) tuples and apply to game state.
+
+        After the game has stopped, the call that drains the last hits also
+        closes the journal and submits the results, so both match the final
+        scoreboard.
+        """
+        # Re-arm the wakeup before draining so anything queued from here on
+        # triggers a fresh notification instead of being missed
+        self._wakeup_pending = False
+        while True:
+            try:
+                item = self.event_queue.get_nowait()
+            except queue.Empty:
+                break
+            if self.metrics is not None:
+                self._apply_instrumented(item, self.metrics)
+            elif isinstance(item, array):
+                # Pre-resolved batch: flat attacker, target slot references (ScoreStore.ref)
+                apply = self._apply_refs
+                it = iter(item)
+                for attacker, target in zip(it, it):
+                    apply(attacker, target)
+            elif isinstance(item, list):
+                for attacker, target in item:
+                    self._apply_hit(attacker, target)
+            else:
+                attacker, target = item
+                self._apply_hit(attacker, target)
+        if self._finish_pending:
+            self._finish_match()
 
     # ---------------------------
-    # Player management
+    # Diagnostics
     # ---------------------------
-    def join_player(self, username: str):
-        """Add a new active player with auto-generated hardware ID and team."""
+    def enable_metrics(self, path: str | None = None) -> EngineMetrics:
+        """Turn on stage timing (call before start_game so queue stamps line up)."""
+        self.metrics = EngineMetrics()
+        if path is not None:
+            self.metrics_path = path
+        return self.metrics
+
+    def disable_metrics(self):
+        self.metrics = None
 
-        # Generate a random 4-digit hex hardware ID
-        rand_num = random.randint(1, 9999)
-        hw_id = f"hw0x{rand_num:04x}"
+    def metrics_snapshot(self) -> dict:
+        """Stage latency histograms + queue gauges for a diagnostics panel ({} when off)."""
+        metrics = self.metrics
+        return metrics.snapshot() if metrics is not None else {}
 
-        # Assign team based on odd/even rule
-        team = "red" if rand_num % 2 == 0 else "green"
+    def queue_stats(self) -> dict:
+        """Depth, high-water mark and shed counts for event_queue and send_queue."""
+        return {"event_queue": self.event_queue.stats(), "send_queue": self.send_queue.stats()}
+
+    # ---------------------------
+    # Player management
+    # ---------------------------
+    def join_player(self, username: str, team: str | None = None, player_id: int | None = None):
+        """Add a new active player with an allocated hardware ID.
+
+        The team comes from the balancing policy unless one is given.
+        Raises RuntimeError once every hardware ID is in use.
+        """
+        hw_id = self.hw_ids.allocate()
+        if team is None:
+            team = self.team_balancer.pick(self.scores)
 
         # Add to active players
-        if hw_id not in self.players:
-            self.players[hw_id] = Player(hw_id, username, team)
-            print(f"[engine] Player joined: {username} ({hw_id}) [{team}]")
-        else:
-            # Very unlikely collision; regenerate
-            print(f"[engine] Collision on {hw_id}, regenerating...")
-            return self.join_player(username)
+        self.add_player(hw_id, username, team, player_id)
 
         # Broadcast registration
         self.send_text(f"REG:{hw_id}:{username}:{team}")
 
 
+    def add_player(self, hw_id: str, username: str, team: str, player_id: int | None = None) -> Player:
+        """Register a player under a known hardware ID (no broadcast)."""
+        slot = self.scores.add(hw_id, team)
+        self.hw_ids.reserve(hw_id)
+        player = Player(hw_id, username, team, self.scores, slot, player_id)
+        self.players[hw_id] = player
+        if slot >= len(self.slot_players):
+            self.slot_players.extend([None] * (slot + 1 - len(self.slot_players)))
+        self.slot_players[slot] = player
+        self.roster_version += 1
+        journal = self.journal
+        if journal is not None:
+            journal.register(slot, hw_id, username, team)
+        self.log.info("player_joined", username=username, hw_id=hw_id, team=team)
+        return player
+
     def remove_player(self, hw_id: str):
         if hw_id in self.players:
-            print(f"[engine] Player removed: {self.players[hw_id].username} ({hw_id})")
+            self.log.info("player_removed", username=self.players[hw_id].username, hw_id=hw_id)
+            journal = self.journal
+            if journal is not None:
+                journal.unregister(self.players[hw_id].slot)
+            self.slot_players[self.players[hw_id].slot] = None
             del self.players[hw_id]
+            self.scores.remove(hw_id)
+            self.hw_ids.release(hw_id)
+            self.dirty_players.discard(hw_id)
+            self.roster_version += 1
+
+    def clear_player_list(self):
+        """Remove every active player (roster reset from the UI)."""
+        journal = self.journal
+        if journal is not None:
+            for player in self.players.values():
+                journal.unregister(player.slot)
+        self.players.clear()
+        self.slot_players = []
+        self.scores.clear()
+        self.hw_ids.reset()
+        self.team_balancer.reset()
+        self.dirty_players.clear()
+        self.roster_version += 1
+
+    def team_total(self, team: str) -> int:
+        """Current total score for a team, maintained incrementally (no iteration)."""
+        return self.scores.team_total(team)
+
+    def top_players(self, k: int = 10, team: str | None = None) -> list[Player]:
+        """Highest-scoring players overall (or on one team), best first."""
+        slot_players = self.slot_players
+        return [slot_players[slot] for slot, _ in self.scores.top(k, team)]
+
+    def player_rank(self, hw_id: str, within_team: bool = False) -> int | None:
+        """1-based rank of a player overall or within their team (ties share a rank)."""
+        slot = self.scores.slot_of.get(hw_id)
+        return None if slot is None else self.scores.rank(slot, within_team)
+
+    def player_stats(self, hw_id: str) -> dict | None:
+        """Combat statistics for one player (O(1); None if not registered)."""
+        slot = self.scores.slot_of.get(hw_id)
+        return None if slot is None else self.scores.stats(slot)
+
+    def export_stats(self) -> list[dict]:
+        """End-of-game rows for every player: identity, score and combat statistics."""
+        rows = self.scores.export_stats()
+        slot_of, slot_players = self.scores.slot_of, self.slot_players
+        for row in rows:
+            row["username"] = slot_players[slot_of[row["hw_id"]]].username
+        return rows
+
+    def take_dirty_players(self) -> set[str]:
+        """Return hw_ids whose score changed since the last call, and reset the set."""
+        dirty, self.dirty_players = self.dirty_players, set()
+        return dirty
 
     # ---------------------------
     # Networking helpers
     # ---------------------------
     def send_code(self, code: str):
         """Queue a plain control code to be sent (e.g., '202', '221')."""
-        self.send_queue.put(str(code))
+        journal = self.journal
+        if journal is not None and code in CONTROL_CODES:
+            journal.control(int(code))
+        self.send_text(code)
 
     def send_text(self, text: str):
         """Queue an arbitrary plain text line to be sent."""
-        self.send_queue.put(str(text))
+        self.send_stats.queued += 1
+        if self.metrics is None:
+            queued = self.send_queue.put(str(text))
+        else:
+            queued = self.send_queue.put((str(text), time.perf_counter_ns(), self._ack_origin_ns))
+        if not queued:
+            self.send_stats.dropped += 1
+        if not queued or self.send_queue.shed != self._shed_logged["send_queue"]:
+            self._report_overload("send_queue", self.send_queue)
 
     # ---------------------------
     # Internal: event application
     # ---------------------------
     def _apply_hit(self, attacker_hwid: str, target_code: str):
         """Apply scoring and broadcasting rules for an incoming 'A:B' string event."""
-        attacker = self.players.get(attacker_hwid)
+        attacker = self.scores.slot_of.get(attacker_hwid)
+        if attacker is None:
+            self.send_text("ERR:unknown-attacker")
+            self.log.warning("unknown_attacker", attacker=attacker_hwid)
+            return
+
+        if target_code == "43":
+            target = TARGET_BASE_43
+        elif target_code == "53":
+            target = TARGET_BASE_53
+        else:
+            target = self.scores.slot_of.get(target_code)
+            if target is None:
+                self.send_text("ERR:unknown-target")
+                self.log.warning("unknown_target", target=target_code)
+                return
+
+        self._apply_slots(attacker, target)
+
+    def _apply_refs(self, attacker_ref: int, target_code: int):
+        """Apply a hit resolved on the network thread (ScoreStore slot references).
+
+        A player removed while the hit was queued no longer resolves, even if
+        a new player has since been given the same slot.
+        """
+        resolve = self.scores.resolve
+        attacker = resolve(attacker_ref)
+        if attacker < 0:
+            self.send_text("ERR:unknown-attacker")
+            return
+        if target_code >= 0:
+            target_code = resolve(target_code)
+            if target_code < 0:
+                self.send_text("ERR:unknown-target")
+                return
+        self._apply_slots(attacker, target_code)
+
+    def _apply_slots(self, attacker_slot: int, target_code: int):
+        """Scoring rules on pre-resolved ids: a player slot, and a slot or base code."""
+        attacker = self.slot_players[attacker_slot]
         if attacker is None:
+            # Player removed while the event was queued
             self.send_text("ERR:unknown-attacker")
-            print(f"[engine] Ignored event: unknown attacker '{attacker_hwid}'")
             return
+        scores = self.scores
+        journal = self.journal
+        if journal is not None:
+            journal.hit(attacker_slot, target_code)
 
         # --- Special codes: base hits ---
-        if target_code == "43":  # green base scored → red attacker gets +100
+        if target_code == TARGET_BASE_43:  # green base scored → red attacker gets +100
             if attacker.team == "red":
-                attacker.score += BASE_43_POINTS
-                print(f"[engine] Red base score! {attacker.username} +{BASE_43_POINTS}")
+                scores.add_points(attacker_slot, BASE_43_POINTS)
+                scores.hits[attacker_slot] += 1
+                scores.record_base_capture(attacker_slot, time.time())
+                self.dirty_players.add(attacker.hw_id)
+                self.kill_feed.push(BASE_43, attacker.username, None, BASE_43_POINTS)
+                self.log.info("base_43", attacker=attacker.username, points=BASE_43_POINTS)
             self.send_code("43")  # broadcast base code
             return
 
-        if target_code == "53":  # red base scored → green attacker gets +100
+        if target_code == TARGET_BASE_53:  # red base scored → green attacker gets +100
             if attacker.team == "green":
-                attacker.score += BASE_53_POINTS
-                print(f"[engine] Green base score! {attacker.username} +{BASE_53_POINTS}")
+                scores.add_points(attacker_slot, BASE_53_POINTS)
+                scores.hits[attacker_slot] += 1
+                scores.record_base_capture(attacker_slot, time.time())
+                self.dirty_players.add(attacker.hw_id)
+                self.kill_feed.push(BASE_53, attacker.username, None, BASE_53_POINTS)
+                self.log.info("base_53", attacker=attacker.username, points=BASE_53_POINTS)
             self.send_code("53")  # broadcast base code
             return
 
         # --- Normal hits ---
-        target = self.players.get(target_code)
+        target = self.slot_players[target_code] if 0 <= target_code < len(self.slot_players) else None
         if target is None:
             self.send_text("ERR:unknown-target")
-            print(f"[engine] Ignored event: unknown target '{target_code}'")
             return
 
         if attacker.team == target.team:
             # Friendly fire → both lose 10 points
-            attacker.score -= 10
-            target.score   -= 10
-            print(f"[engine] Friendly fire: {attacker.username} ({attacker.hw_id}) "
-                  f"hit {target.username} ({target.hw_id}), -10 each")
+            scores.add_points(attacker_slot, -10)
+            scores.add_points(target_code,   -10)
+            scores.record_friendly_fire(attacker_slot, target_code, time.time())
+            self.dirty_players.add(attacker.hw_id)
+            self.dirty_players.add(target.hw_id)
+            self.kill_feed.push(FRIENDLY_FIRE, attacker.username, target.username, 10)
+            self.log.info("friendly_fire", attacker=attacker.username, attacker_id=attacker.hw_id,
+                          target=target.username, target_id=target.hw_id, points=10)
 
             # Broadcast both equipment IDs
             self.send_code(attacker.hw_id)
@@ -224,9 +720,13 @@ class GameEngine:
             return
 
         # Enemy hit → attacker gains 10 points
-        attacker.score += NORMAL_HIT_POINTS
-        print(f"[engine] Enemy hit: {attacker.username} ({attacker.hw_id}) "
-              f"hit {target.username} ({target.hw_id}), +{NORMAL_HIT_POINTS}")
+        scores.add_points(attacker_slot, NORMAL_HIT_POINTS)
+        scores.hits[attacker_slot] += 1
+        scores.record_enemy_hit(attacker_slot, target_code, time.time())
+        self.dirty_players.add(attacker.hw_id)
+        self.kill_feed.push(ENEMY_HIT, attacker.username, target.username, NORMAL_HIT_POINTS)
+        self.log.info("enemy_hit", attacker=attacker.username, attacker_id=attacker.hw_id,
+                      target=target.username, target_id=target.hw_id, points=NORMAL_HIT_POINTS)
 
         # Broadcast target’s equipment ID
         self.send_code(target.hw_id)
@@ -236,6 +736,10 @@ class GameEngine:
     # ---------------------------
     def _listen_loop(self):
         """Receive plain strings; expect 'ATTACKER:TARGET' per packet."""
+        if self.batch_ingest:
+            self._listen_loop_batched()
+            return
+
         while self.running:
             try:
                 data, _ = self.recv_sock.recvfrom(2048)
@@ -246,7 +750,7 @@ class GameEngine:
                 # Expect exactly one colon
                 if ":" not in msg:
                     # Not a hit packet; ignore quietly or log
-                    print(f"[engine] Unknown packet (ignored): {msg}")
+                    self.log.warning("unknown_packet", msg=msg)
                     # Still reply something so generator doesn't hang
                     self.send_text("OK")
                     continue
@@ -256,10 +760,13 @@ class GameEngine:
                 target   = target.strip()
 
                 if attacker and target:
-                    self.event_queue.put((attacker, target))
+                    metrics = self.metrics
+                    if metrics is not None:
+                        metrics.queued_stamps.append(time.perf_counter_ns())
+                    self._queue_events((attacker, target))
                 else:
                     self.send_text("ERR:bad-format")
-                    print(f"[engine] Bad packet (ignored): {msg}")
+                    self.log.warning("bad_packet", msg=msg)
 
             except socket.timeout:
                 continue
@@ -267,44 +774,278 @@ class GameEngine:
                 # Likely socket closed during shutdown
                 break
             except Exception as e:
-                print(f"[engine] Listen error: {e}")
+                self.log.error("listen_error", error=e)
+
+    def _listen_loop_batched(self):
+        """Sleep until the socket is readable, then drain and queue everything waiting."""
+        sel = selectors.DefaultSelector()
+        sel.register(self.recv_sock, selectors.EVENT_READ)
+        while self.running:
+            try:
+                if not sel.select(timeout=1.0):
+                    continue
+                woke_ns = time.perf_counter_ns() if self.metrics is not None else 0
+                packets = drain(self.recv_sock)
+                if not packets:
+                    continue
+
+                self._ingest_packets(packets, woke_ns)
+
+            except (OSError, ValueError):
+                # Likely socket closed during shutdown
+                break
+            except Exception as e:
+                self.log.error("listen_error", error=e)
+        sel.close()
+
+    def _ingest_packets(self, packets: list[bytes], woke_ns: int = 0):
+        """Parse one wakeup's worth of datagrams and queue the hits as a single batch."""
+        metrics = self.metrics
+        if metrics is not None and not woke_ns:
+            woke_ns = time.perf_counter_ns()
+
+        events, replies, rejected = parse_batch_resolved(packets, self.scores.slot_of_bytes, BASE_CODES)
+        if events:
+            if metrics is not None:
+                metrics.queued_stamps.append(woke_ns)  # stamp before put: consumer pops it
+            self._queue_events(events)  # one put per wakeup, not per packet
+        for line in replies:
+            self.send_text(line)
+        for reason, msg in rejected:
+            if reason == "unknown":
+                self.log.warning("unknown_packet", msg=msg)
+            elif reason == "unknown_attacker":
+                self.log.warning("unknown_attacker", attacker=msg)
+            elif reason == "unknown_target":
+                self.log.warning("unknown_target", target=msg)
+            else:
+                self.log.warning("bad_packet", msg=msg)
+
+        self.ingest_stats.record(len(packets), len(events) // 2)
+        if metrics is not None:
+            metrics.record("ingest", time.perf_counter_ns() - woke_ns)
+            metrics.event_queue_depth.sample(self.event_queue.qsize())
+
+    def _queue_events(self, item):
+        """Put one event item on event_queue and wake the UI; account for shedding."""
+        queue_ = self.event_queue
+        if not queue_.put(item):
+            metrics = self.metrics
+            if metrics is not None and metrics.queued_stamps:
+                metrics.queued_stamps.pop()       # its stamp never gets consumed
+        if queue_.shed != self._shed_logged["event_queue"]:
+            self._report_overload("event_queue", queue_)
+        self._notify_events()
+
+    def _event_dropped(self, item):
+        """event_queue shed a queued item: drop its receive stamp too (oldest first)."""
+        metrics = self.metrics
+        if metrics is not None and metrics.queued_stamps:
+            metrics.queued_stamps.popleft()
+
+    def _line_dropped(self, msg):
+        """send_queue shed a queued line (msg) or merged a repeat away (None)."""
+        if msg is None:
+            self.send_stats.coalesced += 1
+        else:
+            self.send_stats.dropped += 1
+
+    def _report_overload(self, name: str, queue_: BoundedQueue, force: bool = False):
+        """Log a queue_overload warning, at most once per OVERLOAD_LOG_INTERVAL."""
+        now = time.monotonic()
+        if not force and now - self._overload_logged_at < OVERLOAD_LOG_INTERVAL:
+            return
+        self._overload_logged_at = now
+        self._shed_logged[name] = queue_.shed
+        self.log.warning("queue_overload", queue=name, policy=queue_.policy, shed=queue_.shed)
+
+    def _apply_instrumented(self, item, metrics: EngineMetrics):
+        """process_pending_events() body with stage timing (metrics on only)."""
+        now = time.perf_counter_ns()
+        origin = metrics.queued_stamps.popleft() if metrics.queued_stamps else 0
+        if origin:
+            metrics.record("queue_wait", now - origin)
+
+        self._ack_origin_ns = origin  # acks queued while applying carry the receive time
+        if isinstance(item, array):
+            apply, it = self._apply_refs, iter(item)
+            pairs = zip(it, it)
+        else:
+            apply = self._apply_hit
+            pairs = item if isinstance(item, list) else (item,)
+        try:
+            for attacker, target in pairs:
+                t0 = time.perf_counter_ns()
+                apply(attacker, target)
+                metrics.record("apply", time.perf_counter_ns() - t0)
+        finally:
+            self._ack_origin_ns = 0
+
+    def _notify_events(self):
+        """Tell the UI events are waiting, unless a wakeup is already outstanding."""
+        callback = self.on_events_ready
+        if callback is None or self._wakeup_pending:
+            return
+        self._wakeup_pending = True
+        try:
+            callback()
+        except Exception as e:
+            self.log.error("callback_error", error=e)
 
     def _send_loop(self):
-        """Drains send_queue and transmits plain strings to (self.ip, self.send_port)."""
-        while self.running or not self.send_queue.empty():
+        """Drains send_queue in batches and transmits plain strings to (self.ip, self.send_port).
+
+        Also drives the engine's timers: it sleeps on the queue no longer than
+        the next timer deadline, then runs whatever is due.
+        """
+        self._send_thread_id = threading.get_ident()
+        get, get_nowait = self.send_queue.get, self.send_queue.get_nowait
+        timers = self.timers
+        while True:
+            timers.advance()
+            if not self.running and self.send_queue.empty():
+                break
+            try:
+                batch = [get(timeout=min(0.5, timers.time_until_next()))]
+            except queue.Empty:
+                continue
+            # Take whatever else is already waiting, up to send_batch
             try:
-                msg = self.send_queue.get(timeout=0.5)
-                line = msg if isinstance(msg, str) else str(msg)
-                self.send_sock.sendto(line.encode(), (self.ip, self.send_port))
+                while len(batch) < self.send_batch:
+                    batch.append(get_nowait())
             except queue.Empty:
+                pass
+            if len(batch) == 1 and batch[0] is _TIMER_WAKEUP:
                 continue
+
+            try:
+                self._send_batch(batch)
             except OSError:
                 # Socket likely closed; exit loop
                 break
             except Exception as e:
-                print(f"[engine] Send error: {e}")
+                self.log.error("send_error", error=e)
 
-    def _game_loop(self):
-        """Simple countdown; on zero, send stop code and halt."""
-        while self.running and self.time_left > 0:
-            time.sleep(1)
-            self.time_left -= 1
+        # Anything still queued once the socket is gone never went out
+        self.send_stats.dropped += self.send_queue.qsize()
+        self._send_thread_id = None
+        self._shutdown()
 
-        # If we exited because running flipped False elsewhere, don't double-stop
-        if not self.running:
+    def _send_batch(self, batch: list):
+        """Transmit one batch; coalesce repeats and record stats/metrics."""
+        sendto    = self.send_sock.sendto
+        addr      = (self.ip, self.send_port)
+        stats     = self.send_stats
+        coalescer = self.coalescer
+        metrics   = self.metrics
+        now = time.monotonic() if coalescer is not None else 0.0
+
+        for i, msg in enumerate(batch):
+            if msg is _TIMER_WAKEUP:
+                continue
+            if isinstance(msg, tuple):
+                line, queued_ns, origin_ns = msg
+            else:
+                line, queued_ns, origin_ns = (msg if isinstance(msg, str) else str(msg)), 0, 0
+
+            if coalescer is not None and coalescer.suppress(line, now):
+                stats.coalesced += 1
+                continue
+
+            try:
+                sendto(line.encode(), addr)
+            except OSError as e:
+                if e.errno in (errno.EBADF, errno.ENOTSOCK) or self.send_sock is None:
+                    stats.dropped += len(batch) - i
+                    raise
+                stats.dropped += 1   # e.g. ENOBUFS under load; keep going
+                continue
+            stats.sent += 1
+
+            if queued_ns and metrics is not None:
+                t = time.perf_counter_ns()
+                metrics.record("send_wait", t - queued_ns)
+                if origin_ns:
+                    metrics.record("end_to_end", t - origin_ns)
+
+        stats.record_batch(len(batch))
+        if metrics is not None:
+            metrics.send_queue_depth.sample(self.send_queue.qsize())
+
+    # ---------------------------
+    # Timer callbacks (send thread)
+    # ---------------------------
+    def _schedule_clock_tick(self):
+        """Keep time_left in whole seconds, ticking as each second boundary passes."""
+        remaining = self.remaining()
+        self.time_left = math.ceil(remaining)
+        if self.time_left > 0 and not self._stopping:
+            self.timers.schedule(remaining - (self.time_left - 1), self._schedule_clock_tick)
+
+    def _begin_stop(self):
+        """Queue the 221 burst, then let the loops wind down (game end or stop_game)."""
+        if self._stopping:
             return
+        self._stopping = True
+        self.timers.cancel(self._start_code_timer)  # a very quick stop doesn't still send 202
+        self.time_left = math.ceil(self.remaining())
+        self._end_at = None
 
-        # Game over path
-        self.stop_game()
+        self.send_code("221")
+        for i in range(1, STOP_CODE_REPEAT):
+            self.timers.schedule(i * STOP_CODE_GAP, self.send_code, "221")
+        self.timers.schedule((STOP_CODE_REPEAT - 1) * STOP_CODE_GAP + STOP_SETTLE, self._finish_stop)
 
-    def _delayed_start_code(self):
-        """Sleep ~3s after start and emit the start code '202' once."""
-        # Small guard so a very quick stop doesn't still send 202
-        t0 = time.time()
-        while self.running and (time.time() - t0) < 3.0:
-            time.sleep(0.05)
-        if self.running:
-            self.send_code("202")
+    def _finish_stop(self):
+        # Flip running off; loops will end and the send thread runs _shutdown()
+        self.running = False
+
+    # ---------------------------
+    # Match journal
+    # ---------------------------
+    def _open_journal(self):
+        """Open the journal (if configured) and record the roster as it stands."""
+        if not self.journal_path or self.journal is not None:
+            return
+        try:
+            journal = JournalWriter(self.journal_path)
+        except OSError as e:
+            self.log.error("journal_error", error=e)
+            return
+        for team in self.scores.team_names:
+            journal.team(team)
+        store = self.scores
+        carried = (store.scores, store.hits, store.hits_dealt, store.hits_taken, store.base_captures,
+                   store.friendly_fire, store.streak, store.longest_streak)
+        for player in self.players.values():
+            slot = player.slot
+            journal.register(slot, player.hw_id, player.username, player.team)
+            # Anything carried over from an earlier match, so this one replays on its own
+            for field, values in enumerate(carried):
+                if values[slot]:
+                    journal.state(slot, field, values[slot])
+            if store.last_hit[slot]:
+                journal.state(slot, len(carried), int(store.last_hit[slot] * 1e9))
+        self.journal = journal
+        self.log.info("journal_opened", path=self.journal_path)
+
+    def _submit_results(self):
+        """Hand the final standings to the results writer (queues only; never blocks)."""
+        writer = self.results_writer
+        if writer is None or self.started_at is None:
+            return
+        try:
+            writer.submit(match_summary(self))
+        except Exception as e:
+            self.log.error("results_error", error=e)
+
+    def _close_journal(self):
+        journal, self.journal = self.journal, None
+        if journal is not None:
+            try:
+                journal.close()
+            except OSError as e:
+                self.log.error("journal_error", error=e)
 
     # ---------------------------
     # Thread helper
@@ -313,3 +1054,58 @@ class GameEngine:
         th = threading.Thread(target=target, daemon=True, name=f"engine-{name}" if name else None)
         self._threads.append(th)
         th.start()
+
+
+# ---------------------------
+# Driving an engine without Qt
+# ---------------------------
+class EventPump:
+    """
+    Stands in for the UI's event loop: waits for on_events_ready (or
+    `interval` seconds), then calls process_pending_events() and on_tick().
+
+        pump = EventPump(engine)
+        pump.start("arena-north")     # own thread; or pump.run() on this one
+        ...
+        pump.stop()
+    """
+
+    def __init__(self, engine, interval: float = 0.5, on_tick: Callable[[], None] | None = None):
+        self.engine = engine
+        self.interval = interval
+        self.on_tick = on_tick
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        engine.on_events_ready = self._wake.set
+
+    def run(self, until: Callable[[], bool] | None = None):
+        """Pump on the calling thread until stop() is called or until() is true."""
+        engine = self.engine
+        wake = self._wake
+        while not self._stop.is_set() and (until is None or not until()):
+            wake.wait(timeout=self.interval)
+            wake.clear()
+            engine.process_pending_events()
+            if self.on_tick is not None:
+                self.on_tick()
+
+    def start(self, name: str = "engine-pump") -> threading.Thread:
+        """Pump on a daemon thread of its own."""
+        self._thread = threading.Thread(target=self.run, daemon=True, name=name)
+        self._thread.start()
+        return self._thread
+
+    def wake(self):
+        """Process pending events now instead of at the next interval."""
+        self._wake.set()
+
+    def stop(self, timeout: float | None = None):
+        """End run() and join the pump thread, if any. The engine is left as it is."""
+        self._stop.set()
+        self._wake.set()
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        if self.engine.on_events_ready == self._wake.set:
+            self.engine.on_events_ready = None
@@ -0,0 +1,260 @@
+"""
+engine_async.py
+---------------
+asyncio variant of the Photon game engine.
+
+Same public API and scoring rules as engine.GameEngine (it subclasses it),
+but instead of four OS threads polling with sleeps and queue timeouts,
+everything timed or networked runs on ONE asyncio event loop:
+
+- Receive: DatagramProtocol on recv_port. asyncio hands over one datagram
+  per readiness callback, so the engine then drains whatever else is
+  waiting on the socket (udp_ingest.drain); all of it is parsed and queued
+  as a single batch
+- Send:    datagram transport; send_code()/send_text() go straight to
+  sendto() on the loop (thread-safe hand-off when called from the UI),
+  counted in send_stats and timed in metrics like GameEngine's sends
+- Timer:   countdown against the loop's monotonic clock, no sleep drift
+- Codes:   "202" scheduled 3 s after start, "221" x3 at game end
+
+The loop runs on its own thread by default. Pass loop=... to schedule the
+engine on an event loop you already run (e.g. a Qt/asyncio bridge such
+as qasync); in that case no thread is started.
+
+The UI side is unchanged: hits still land on event_queue and are applied
+by process_pending_events() on the caller's thread.
+"""
+
+import asyncio
+import math
+import socket
+import threading
+import time
+
+from engine import (GameEngine, START_CODE_DELAY, STOP_CODE_REPEAT, STOP_CODE_GAP,
+                    EVENT_QUEUE_CAPACITY, OVERLOAD_POLICY)
+from udp_ingest import open_recv_socket, drain, IngestStats, MAX_BATCH
+
+
+class _HitProtocol(asyncio.DatagramProtocol):
+    """Receives 'ATTACKER:TARGET' datagrams and hands them to the engine."""
+
+    def __init__(self, engine: "AsyncGameEngine"):
+        self.engine = engine
+
+    def datagram_received(self, data, addr):
+        self.engine._on_datagram(data)
+
+    def error_received(self, exc):
+        self.engine.log.error("listen_error", error=exc)
+
+
+class AsyncGameEngine(GameEngine):
+    def __init__(self, ip="127.0.0.1", send_port=7500, recv_port=7501, game_time=300,
+                 loop: asyncio.AbstractEventLoop | None = None, log=None, journal_path=None,
+                 team_policy="alternate", event_queue_size=EVENT_QUEUE_CAPACITY,
+                 overload_policy=OVERLOAD_POLICY, results_writer=None):
+        super().__init__(ip, send_port, recv_port, game_time, log=log, journal_path=journal_path,
+                         team_policy=team_policy, event_queue_size=event_queue_size,
+                         overload_policy=overload_policy, results_writer=results_writer)
+
+        # Event loop: caller-owned (bridge) or created on our own thread
+        self._external_loop = loop
+        self._loop: asyncio.AbstractEventLoop | None = loop
+        self._loop_thread_id: int | None = None
+
+        # Transports exist only while a game is running
+        self._recv_transport = None
+        self._send_transport = None
+
+        # Raw receive socket behind _recv_transport (drained directly per wakeup)
+        self._recv_raw: socket.socket | None = None
+
+        # Shutdown coordination
+        self._stop_event: asyncio.Event | None = None
+        self._ready = threading.Event()
+        self._done  = threading.Event()
+        self._start_error: BaseException | None = None
+
+    # ---------------------------
+    # Public API
+    # ---------------------------
+    def start_game(self):
+        """Open endpoints on the event loop, start the clock; '202' follows after ~3s."""
+        if self.running:
+            return
+        self.running = True
+        self.ingest_stats = IngestStats()
+        self._ready.clear()
+        self._done.clear()
+        self._start_error = None
+        self._stop_event = asyncio.Event()
+        if self._finish_pending:
+            self.process_pending_events()   # previous match: last queued hits, journal, results
+        self.started_at = time.time()
+        self._open_journal()
+
+        if self._external_loop is not None:
+            asyncio.run_coroutine_threadsafe(self._run(), self._external_loop)
+        else:
+            self._start_thread(self._run_loop_thread, name="asyncio")
+            # Wait for the sockets so errors (port in use) surface here, like before
+            self._ready.wait(timeout=5.0)
+            if self._start_error is not None:
+                self.running = False
+                raise self._start_error
+
+        self.log.info("game_started")
+
+    def stop_game(self):
+        """Send stop codes, close endpoints and let the loop wind down."""
+        if not self.running or self._loop is None or self._stop_event is None:
+            return
+
+        if threading.get_ident() == self._loop_thread_id:
+            # Called from the loop itself; _run() finishes the shutdown
+            self._stop_event.set()
+            return
+
+        self._loop.call_soon_threadsafe(self._stop_event.set)
+        if self._external_loop is None:
+            self._done.wait(timeout=2.0)
+
+    def send_text(self, text: str):
+        """Send a plain text line now if the loop is up, otherwise queue it for start."""
+        line = str(text)
+        self.send_stats.queued += 1
+        loop = self._loop
+        if self._send_transport is None or loop is None:
+            if not self.send_queue.put(line):
+                self.send_stats.dropped += 1
+        elif threading.get_ident() == self._loop_thread_id:
+            self._send_now(line, 0, self._ack_origin_ns)
+        else:
+            queued_ns = time.perf_counter_ns() if self.metrics is not None else 0
+            loop.call_soon_threadsafe(self._send_now, line, queued_ns, self._ack_origin_ns)
+
+    def call_later(self, delay: float, callback, *args):
+        """Run callback(*args) on the event loop after delay seconds (game must be running)."""
+        loop = self._loop
+        if loop is None:
+            raise RuntimeError("call_later() needs a running game")
+        if threading.get_ident() == self._loop_thread_id:
+            return loop.call_later(delay, callback, *args)
+
+        async def later():
+            await asyncio.sleep(delay)
+            callback(*args)
+        return asyncio.run_coroutine_threadsafe(later(), loop)
+
+    def cancel_timer(self, handle):
+        if handle is not None:
+            handle.cancel()
+
+    # ---------------------------
+    # Event loop side
+    # ---------------------------
+    def _run_loop_thread(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._run())
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        self._loop_thread_id = threading.get_ident()
+
+        try:
+            self._recv_raw = open_recv_socket(self.recv_port)
+            self._recv_transport, _ = await loop.create_datagram_endpoint(
+                lambda: _HitProtocol(self), sock=self._recv_raw)
+            self._send_transport, _ = await loop.create_datagram_endpoint(
+                asyncio.DatagramProtocol, family=socket.AF_INET, allow_broadcast=True)
+        except BaseException as e:
+            self._start_error = e
+            self.running = False
+            self._close_transports()
+            self._close_journal()
+            self._ready.set()
+            self._done.set()
+            if self._external_loop is not None:
+                self.log.error("start_error", error=e)
+            return
+        self._ready.set()
+
+        # Anything queued before start (e.g. REG broadcasts) goes out first
+        while not self.send_queue.empty():
+            self._send_now(self.send_queue.get_nowait())
+
+        start_code = loop.call_later(START_CODE_DELAY, self.send_code, "202")
+        try:
+            await self._countdown(loop)
+            start_code.cancel()
+            for _ in range(STOP_CODE_REPEAT):
+                self.send_code("221")
+                await asyncio.sleep(STOP_CODE_GAP)
+        finally:
+            self.running = False
+            self._close_transports()
+            self._recv_raw = None
+            self._loop_thread_id = None
+            self._done.set()
+            self.log.info("game_stopped")
+            self._match_over()
+
+    async def _countdown(self, loop):
+        """Tick time_left against a fixed monotonic deadline until zero or stop."""
+        deadline = loop.time() + self.time_left
+        self._end_at = time.monotonic() + self.time_left   # for remaining()
+        while self.time_left > 0 and not self._stop_event.is_set():
+            remaining = deadline - loop.time()
+            try:
+                await asyncio.wait_for(self._stop_event.wait(),
+                                       timeout=min(1.0, max(remaining, 0.0)))
+            except asyncio.TimeoutError:
+                pass
+            self.time_left = max(0, math.ceil(deadline - loop.time()))
+        self._end_at = None
+
+    def _on_datagram(self, data: bytes):
+        # One datagram per callback: take the rest of the backlog with it
+        packets = [data]
+        sock = self._recv_raw
+        if sock is not None:
+            try:
+                packets += drain(sock, MAX_BATCH - 1)
+            except OSError as e:
+                self.log.error("listen_error", error=e)
+        self._ingest_packets(packets)
+
+    def _send_now(self, line: str, queued_ns: int = 0, origin_ns: int = 0):
+        stats = self.send_stats
+        transport = self._send_transport
+        if transport is None or transport.is_closing():
+            stats.dropped += 1
+            return
+        try:
+            transport.sendto(line.encode(), (self.ip, self.send_port))
+        except OSError as e:
+            stats.dropped += 1
+            self.log.error("send_error", error=e)
+            return
+        stats.sent += 1
+        stats.record_batch(1)
+        metrics = self.metrics
+        if metrics is not None:
+            t = time.perf_counter_ns()
+            if queued_ns:
+                metrics.record("send_wait", t - queued_ns)
+            if origin_ns:
+                metrics.record("end_to_end", t - origin_ns)
+
+    def _close_transports(self):
+        for transport in (self._recv_transport, self._send_transport):
+            if transport is not None:
+                transport.close()
+        self._recv_transport = None
+        self._send_transport = None
@@ -23,6 +23,9 @@ import socket # UDP sockets
 import queue # Data Structure of choice
 import time # For clock
 import random # random hardware IDs
+import selectors # Sleep until the socket has data
+
+from udp_ingest import open_recv_socket, drain, parse_batch, IngestStats # Batched receive helpers
 
 # | Scoring Rules |
 STANDARD_HIT = 10 # 10 Points for P2P Combat
@@ -40,7 +43,8 @@ class Player:
         
 # | Main Game Engine |
 class GameEngine:
-    def __init__(self, ip="127.0.0.1", send_port=7500, recv_port=7501, game_time=300): #Initialized Values for Game Settings (Should NOT Change)
+    def __init__(self, ip="127.0.0.1", send_port=7500, recv_port=7501, game_time=300,
+                 batch_ingest=True): #Initialized Values for Game Settings (Should NOT Change)
         self.players: dict[str, Player] = {} # Dictionary to hold the list of players
         
         self.time_left = game_time
@@ -51,9 +55,12 @@ class GameEngine:
         self.send_port = send_port # We send signals TO port 7500 (The Generator)
         self.recv_port = recv_port # We receive signals INTO port 7501
         
-        self.event_queue: queue.Queue[tuple[str,str]] = queue.Queue() # Event Queue holds tuples (attacker, target)
+        self.event_queue: queue.Queue[tuple[str,str] | list[tuple[str,str]]] = queue.Queue() # Event Queue holds tuples (attacker, target), or lists of them when batching
         self.send_queue: queue.Queue[str]             = queue.Queue() # Send Queue holds strings
         
+        self.batch_ingest = batch_ingest # True = drain every waiting packet per wakeup
+        self.ingest_stats = IngestStats() # Packets per wakeup counters
+        
         # UDP Sockets
         self.recv_sock = None
         self.send_sock = None
@@ -73,9 +80,8 @@ class GameEngine:
         self.running = True
         
         # Socket Setup
-        self.recv_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM) # Receiving Socket
-        self.recv_sock.bind(("0.0.0.0", self.recv_sock))
-        self.recv_sock.settimeout(1.0)
+        self.recv_sock = open_recv_socket(self.recv_port, blocking=not self.batch_ingest) # Receiving Socket
+        self.ingest_stats = IngestStats()
         
         self.send_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.send_sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
@@ -105,7 +111,7 @@ class GameEngine:
         # Close Sockets
         try:
             if self.recv_sock:
-                self.recv_sock.accept
+                self.recv_sock.close()
         finally:
             self.recv_sock = None
             
@@ -117,6 +123,20 @@ class GameEngine:
             
         print("[engine] Game stopped")
         
+    def process_pending_events(self):
+        """Drain queued (attacker, target) tuples (or batches of them) and apply to game state"""
+        while True:
+            try:
+                item = self.event_queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, list): # Whole batch from one wakeup
+                for attacker, target in item:
+                    self._apply_hit(attacker, target)
+            else:
+                attacker, target = item
+                self._apply_hit(attacker, target)
+        
     def join_player(self, username: str):
         """Add new player with auto-gen hardware ID/team"""
         
@@ -214,6 +234,10 @@ class GameEngine:
     # | Necessary Threads |
     def _listen_loop(self):
         """Recieves plain strings; expects each packet formatted as 'ATTACKER:TARGET"""
+        if self.batch_ingest: # Batched mode drains the whole socket each wakeup
+            self._listen_loop_batched()
+            return
+        
         while self.running:
             try: #Try-Catch block cause things be getting freaky
                 data, _ = self.recv_sock.recvfrom(2048)
@@ -247,6 +271,37 @@ class GameEngine:
                 print(f"[engine] Listen error: {e}") # Catch-All Statement for random errors
                 print("bruh")
                 
+    def _listen_loop_batched(self):
+        """Sleeps until the socket is readable, then drains + queues every waiting packet"""
+        sel = selectors.DefaultSelector()
+        sel.register(self.recv_sock, selectors.EVENT_READ)
+        while self.running:
+            try:
+                if not sel.select(timeout=1.0): # Nothing arrived within 1 second
+                    continue
+                packets = drain(self.recv_sock) # Everything waiting on the socket
+                if not packets:
+                    continue
+                
+                events, replies, rejected = parse_batch(packets)
+                if events:
+                    self.event_queue.put(events) # One put per wakeup instead of one per packet
+                for line in replies:
+                    self.send_text(line)
+                for reason, msg in rejected:
+                    if reason == "unknown":
+                        print(f"[engine] Unknown Packet (ignored): {msg}")
+                    else:
+                        print(f"[engine] Bad packet (ignored): {msg}")
+                
+                self.ingest_stats.record(len(packets), len(events))
+                
+            except (OSError, ValueError): # Socket closed during shutdown
+                break
+            except Exception as e:
+                print(f"[engine] Listen error: {e}") # Catch-All Statement for random errors
+        sel.close()
+                
     def _send_loop(self):
         """Takes data from send queue and transmits strings to generator through ip and send port"""
         while self.running or not self.send_queue.empty():
@@ -283,5 +338,5 @@ class GameEngine:
     # | Thread Helper |
     def _start_thread(self, target, name: str = ""): # Helps Initialize New Threads
         th = threading.Thread(target=target, daemon=True, name=f"engine-{name}" if name else None)
-        self.threads.append(th)
+        self._threads.append(th)
         th.start() 
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""
+event_log.py
+------------
+Structured, level-gated event logger with a background writer.
+
+print() on the scoring and network threads formats a string and does a
+blocking stdout write for every hit. Here a log call only:
+  1. compares the level (filtered records cost one int compare, no string),
+  2. appends a small tuple (time, level, event, fields) to a bounded ring
+     buffer (collections.deque with maxlen; oldest records are dropped and
+     counted if the writer can't keep up).
+A daemon writer thread drains the buffer every flush_interval, formats the
+records and writes them to stdout or a file, as text or JSON lines.
+
+Recently written records are kept in a small history ring for the UI:
+recent(n) returns them formatted.
+
+Record formatting uses per-event templates, e.g.
+    log.register_templates({"enemy_hit": "Enemy hit: {attacker} hit {target}"})
+    log.info("enemy_hit", attacker="Bob", target="Ann")
+Events without a template are written as "event key=value ...".
+"""
+
+import atexit
+import json
+import sys
+import threading
+import time
+from collections import deque
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+
+class EventLogger:
+    def __init__(self, source: str = "engine", level: int = INFO, capacity: int = 8192,
+                 history: int = 500, sink=None, fmt: str = "text", flush_interval: float = 0.05):
+        self.source = source
+        self.level  = level                   # records below this are never built
+        self.fmt    = fmt                     # "text" or "json"
+        self.flush_interval = flush_interval
+        self.dropped = 0                      # records overwritten before the writer got them
+
+        self._buf: deque = deque(maxlen=capacity)
+        self._history: deque = deque(maxlen=history)
+        self._templates: dict[str, str] = {}
+        self._sink = sink                     # file object; None = sys.stdout at write time
+        self._owns_sink = False
+
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # ---------------------------
+    # Configuration
+    # ---------------------------
+    def register_templates(self, templates: dict[str, str]):
+        self._templates.update(templates)
+
+    def set_level(self, level: int):
+        self.level = level
+
+    def set_sink(self, target=None, fmt: str | None = None):
+        """Write to a path (appended), an open file object, or None for stdout."""
+        self.flush()
+        with self._write_lock:
+            if self._owns_sink and self._sink is not None:
+                self._sink.close()
+            if isinstance(target, str):
+                self._sink = open(target, "a", encoding="utf-8")
+                self._owns_sink = True
+            else:
+                self._sink = target
+                self._owns_sink = False
+            if fmt is not None:
+                self.fmt = fmt
+
+    # ---------------------------
+    # Logging (hot path)
+    # ---------------------------
+    def log(self, level: int, event: str, **fields):
+        if level < self.level:
+            return
+        buf = self._buf
+        if len(buf) == buf.maxlen:
+            self.dropped += 1
+        buf.append((time.time(), level, event, fields))
+        if self._thread is None:
+            self._start_writer()
+
+    def debug(self, event: str, **fields):
+        if DEBUG >= self.level:
+            self.log(DEBUG, event, **fields)
+
+    def info(self, event: str, **fields):
+        if INFO >= self.level:
+            self.log(INFO, event, **fields)
+
+    def warning(self, event: str, **fields):
+        if WARNING >= self.level:
+            self.log(WARNING, event, **fields)
+
+    def error(self, event: str, **fields):
+        if ERROR >= self.level:
+            self.log(ERROR, event, **fields)
+
+    # ---------------------------
+    # Reading back
+    # ---------------------------
+    def recent(self, n: int | None = None) -> list[str]:
+        """Most recent written records, formatted as text (oldest first)."""
+        records = list(self._history)
+        if n is not None:
+            records = records[-n:]
+        return [self._format_text(r) for r in records]
+
+    def recent_records(self, n: int | None = None) -> list[dict]:
+        records = list(self._history)
+        if n is not None:
+            records = records[-n:]
+        return [self._as_dict(r) for r in records]
+
+    # ---------------------------
+    # Writer
+    # ---------------------------
+    def flush(self):
+        """Write everything buffered so far (from any thread)."""
+        with self._write_lock:
+            self._drain()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self.flush()
+
+    def _start_writer(self):
+        with self._write_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._writer_loop, daemon=True,
+                                            name=f"log-{self.source}")
+            self._thread.start()
+        atexit.register(self.flush)
+
+    def _writer_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            if self._buf:
+                with self._write_lock:
+                    self._drain()
+
+    def _drain(self):
+        buf = self._buf
+        if not buf:
+            return
+        sink = self._sink or sys.stdout
+        lines = []
+        popleft = buf.popleft
+        history = self._history
+        fmt_json = self.fmt == "json"
+        try:
+            while True:
+                record = popleft()
+                history.append(record)
+                lines.append(json.dumps(self._as_dict(record), default=str) if fmt_json
+                             else self._format_text(record))
+        except IndexError:
+            pass
+        try:
+            sink.write("\n".join(lines) + "\n")
+            sink.flush()
+        except (OSError, ValueError):
+            pass
+
+    # ---------------------------
+    # Formatting (writer side only)
+    # ---------------------------
+    def _message(self, event: str, fields: dict) -> str:
+        template = self._templates.get(event)
+        if template is not None:
+            try:
+                return template.format(**fields)
+            except (KeyError, IndexError, ValueError):
+                pass
+        if not fields:
+            return event
+        return event + " " + " ".join(f"{k}={v}" for k, v in fields.items())
+
+    def _format_text(self, record) -> str:
+        ts, level, event, fields = record
+        return f"[{self.source}] {self._message(event, fields)}"
+
+    def _as_dict(self, record) -> dict:
+        ts, level, event, fields = record
+        return {"ts": ts, "level": LEVEL_NAMES.get(level, level), "source": self.source,
+                "event": event, "msg": self._message(event, fields), **fields}
@@ -0,0 +1,195 @@
+"""
+headless.py
+-----------
+Run a match without the Qt UI (arena servers, load tests, CI).
+
+PyQt5 is never imported here, and psycopg2 only when the roster comes from
+the database. The roster is joined, the match runs for --game-time seconds
+on the configured ports, and score changes are streamed to stdout or a
+file as they are applied. Ctrl+C stops the match early (221 is still sent).
+
+Roster sources:
+    --roster FILE      roster_csv format: codename | id,codename | id,codename,team
+                       (header row and blank lines are skipped)
+    --ids 1 2 3        look up player ids in the players table
+    --all-players      everyone in the players table
+
+Examples:
+    python headless.py --roster tonight.csv --game-time 360
+    python headless.py --ids 101 102 103 104 --out scores.jsonl --format json
+    python headless.py --roster tonight.csv --recv-port 7601 --send-port 7600 --journal m1.jrnl
+    python headless.py --ids 101 102 --journal m2.jrnl --save-results --save-events
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from bounded_queue import POLICIES
+from hwid_alloc import TEAM_POLICIES, TEAMS
+from roster_csv import read_roster_csv
+
+
+def read_roster_db(ids=None):
+    """(codename, None, player_id) for the given player ids (or the whole table) from PostgreSQL."""
+    import db_helper                            # psycopg2 only in this mode
+    try:
+        if ids is None:
+            return [(codename, None, player_id) for player_id, codename in db_helper.fetch_all_players()], []
+        roster, missing = [], []
+        for player_id in ids:
+            player = db_helper.search_player(player_id)
+            if player is None:
+                missing.append((player_id, "not in players table"))
+            else:
+                roster.append((player["codename"], None, player["id"]))
+        return roster, missing
+    finally:
+        db_helper.close_pool()
+
+
+class ScoreStream:
+    """Writes score changes as text lines or JSON objects, one per line."""
+
+    def __init__(self, out, fmt="text"):
+        self.out = out
+        self.fmt = fmt
+
+    def update(self, engine, hw_ids, final=False):
+        changed = [p for p in engine.top_players(None) if p.hw_id in hw_ids]   # best first
+        if not changed and not final:
+            return
+        totals = {team: engine.team_total(team) for team in TEAMS}
+        if self.fmt == "json":
+            record = {
+                "ts": round(time.time(), 3),
+                "time_left": engine.time_left,
+                "final": final,
+                "totals": totals,
+                "players": {p.hw_id: {"username": p.username, "team": p.team, "score": p.score,
+                                      **(p.stats if final else {})}
+                            for p in changed},
+            }
+            self.out.write(json.dumps(record) + "\n")
+        else:
+            tag = "final" if final else f"{engine.time_left:>4}s"
+            for p in changed:
+                line = f"[{tag}] {p.username} ({p.hw_id}) [{p.team}] {p.score}"
+                if final:
+                    st = p.stats
+                    line += (f"  dealt={st['hits_dealt']} taken={st['hits_taken']} "
+                             f"bases={st['base_captures']} ff={st['friendly_fire']} "
+                             f"streak={st['longest_streak']}")
+                self.out.write(line + "\n")
+            self.out.write(f"[{tag}] totals red={totals['red']} green={totals['green']}\n")
+        self.out.flush()
+
+
+def run_match(engine, stream: ScoreStream, interval: float = 0.5):
+    """Drive the engine like the UI would until the game timer (or Ctrl+C) stops it."""
+    from engine import EventPump
+
+    last_emit = 0.0
+
+    def emit():
+        nonlocal last_emit
+        now = time.monotonic()
+        if now - last_emit >= interval and engine.dirty_players:
+            stream.update(engine, engine.take_dirty_players())
+            last_emit = now
+
+    pump = EventPump(engine, interval, on_tick=emit)
+    engine.start_game()
+    try:
+        pump.run(until=lambda: not engine.running)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pump.stop()
+        engine.stop_game()
+        engine.process_pending_events()
+        stream.update(engine, set(engine.players), final=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a Photon match without the Qt UI.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--roster", metavar="FILE", help="roster CSV (codename | id,codename[,team])")
+    source.add_argument("--ids", type=int, nargs="+", metavar="ID", help="player ids from the players table")
+    source.add_argument("--all-players", action="store_true", help="everyone in the players table")
+    parser.add_argument("--game-time", type=int, default=300, help="match length in seconds")
+    parser.add_argument("--ip", default="127.0.0.1", help="where the engine sends codes/broadcasts")
+    parser.add_argument("--send-port", type=int, default=7500)
+    parser.add_argument("--recv-port", type=int, default=7501)
+    parser.add_argument("--asyncio", action="store_true", help="use the asyncio engine")
+    parser.add_argument("--team-policy", choices=sorted(TEAM_POLICIES), default="alternate",
+                        help="how players without a team in the roster are placed")
+    parser.add_argument("--journal", metavar="FILE", default=None, help="write a binary match journal")
+    parser.add_argument("--save-results", action="store_true",
+                        help="save the final results to the match history tables")
+    parser.add_argument("--save-events", action="store_true",
+                        help="with --save-results: also save every hit (needs --journal)")
+    parser.add_argument("--queue-size", type=int, default=None,
+                        help="hits the event queue holds before shedding (0 = unbounded)")
+    parser.add_argument("--overload-policy", choices=POLICIES, default=None,
+                        help="what to shed when the event queue is full (default drop-oldest)")
+    parser.add_argument("--out", default="-", help="score stream destination (- = stdout)")
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    parser.add_argument("--interval", type=float, default=0.5,
+                        help="seconds between score updates (changes are batched)")
+    parser.add_argument("--log", metavar="FILE", default=None,
+                        help="engine log destination (default stderr)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="engine log: errors only")
+    args = parser.parse_args(argv)
+
+    if args.roster:
+        roster, errors = read_roster_csv(args.roster)
+    else:
+        roster, errors = read_roster_db(args.ids)
+    for where, text in errors:
+        print(f"[headless] skipped {where}: {text}", file=sys.stderr)
+    if not roster:
+        parser.error("roster is empty")
+    if args.save_events and not (args.save_results and args.journal):
+        parser.error("--save-events needs --save-results and --journal")
+
+    from engine import engine_log
+    from event_log import WARNING
+    engine_log.set_sink(args.log if args.log else sys.stderr)
+    if args.quiet:
+        engine_log.set_level(WARNING)
+
+    kwargs = dict(ip=args.ip, send_port=args.send_port, recv_port=args.recv_port,
+                  game_time=args.game_time, journal_path=args.journal, team_policy=args.team_policy)
+    results = None
+    if args.save_results:
+        from match_history import ResultWriter
+        results = kwargs["results_writer"] = ResultWriter(events=args.save_events)
+    if args.queue_size is not None:
+        kwargs["event_queue_size"] = args.queue_size
+    if args.overload_policy is not None:
+        kwargs["overload_policy"] = args.overload_policy
+    if args.asyncio:
+        from engine_async import AsyncGameEngine
+        engine = AsyncGameEngine(**kwargs)
+    else:
+        from engine import GameEngine
+        engine = GameEngine(**kwargs)
+    for codename, team, player_id in roster:
+        engine.join_player(codename, team, player_id=player_id)
+
+    out = sys.stdout if args.out == "-" else open(args.out, "a", encoding="utf-8")
+    try:
+        run_match(engine, ScoreStream(out, args.format), interval=args.interval)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if results is not None:
+            results.close()
+        engine_log.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
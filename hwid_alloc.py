@@ -0,0 +1,148 @@
+"""
+hwid_alloc.py
+-------------
+Hardware-ID allocation and team balancing for join_player().
+
+HwIdAllocator hands out IDs hw0x0001 ... hw0x270f (1..9999, the range the
+old random draw used) with no collisions and no retries:
+- never-used IDs come off a counter,
+- released IDs go on a free list and are reused first,
+- a bytearray bitmap marks IDs in use, so IDs registered from elsewhere
+  (add_player with a known ID, journal replay) are skipped when their turn
+  comes.
+allocate(), reserve() and release() are O(1) (amortised, for skips) up to
+the full ID space.
+
+TeamBalancer picks a team for each new player by policy:
+- "alternate"    red, green, red, ... in join order
+- "least-count"  team with fewer players
+- "least-score"  team with the lower total score (joins go to the team
+                 that is behind)
+or any callable(store, teams, joined) -> team name. Ties go to the team
+listed first.
+"""
+
+HWID_MIN = 1
+HWID_MAX = 9999
+HWID_PREFIX = "hw0x"
+
+TEAMS = ("red", "green")
+
+
+def format_hwid(n: int) -> str:
+    return f"{HWID_PREFIX}{n:04x}"
+
+
+def parse_hwid(hw_id: str) -> int | None:
+    """Numeric part of an allocator-style ID, or None for anything else."""
+    if not hw_id.startswith(HWID_PREFIX):
+        return None
+    try:
+        return int(hw_id[len(HWID_PREFIX):], 16)
+    except ValueError:
+        return None
+
+
+class HwIdAllocator:
+    def __init__(self, low: int = HWID_MIN, high: int = HWID_MAX):
+        self.low  = low
+        self.high = high
+        self._used = bytearray(high + 1)      # 1 = in use
+        self._next = low                      # lowest never-handed-out ID
+        self._free: list[int] = []            # released IDs (reused first)
+        self.in_use = 0
+
+    def __len__(self):
+        return self.in_use
+
+    @property
+    def available(self) -> int:
+        return self.high - self.low + 1 - self.in_use
+
+    def allocate(self) -> str:
+        """Return an unused hardware ID. Raises RuntimeError when all are taken."""
+        used = self._used
+        free = self._free
+        while free:
+            n = free.pop()
+            if not used[n]:                   # may have been reserved since release
+                return self._take(n)
+        while self._next <= self.high:
+            n = self._next
+            self._next += 1
+            if not used[n]:
+                return self._take(n)
+        raise RuntimeError(f"no free hardware IDs ({self.high - self.low + 1} in use)")
+
+    def reserve(self, hw_id: str) -> bool:
+        """Mark an externally chosen ID as in use. False if it's outside our range."""
+        n = parse_hwid(hw_id)
+        if n is None or not self.low <= n <= self.high:
+            return False
+        if not self._used[n]:
+            self._used[n] = 1
+            self.in_use += 1
+        return True
+
+    def release(self, hw_id: str):
+        n = parse_hwid(hw_id)
+        if n is None or not self.low <= n <= self.high or not self._used[n]:
+            return
+        self._used[n] = 0
+        self.in_use -= 1
+        self._free.append(n)
+
+    def reset(self):
+        self._used = bytearray(self.high + 1)
+        self._next = self.low
+        self._free.clear()
+        self.in_use = 0
+
+    def _take(self, n: int) -> str:
+        self._used[n] = 1
+        self.in_use += 1
+        return format_hwid(n)
+
+
+# ---------------------------
+# Team balancing
+# ---------------------------
+def alternate(store, teams, joined: int) -> str:
+    return teams[joined % len(teams)]
+
+
+def least_count(store, teams, joined: int) -> str:
+    return min(teams, key=lambda team: store.team_size(team))
+
+
+def least_score(store, teams, joined: int) -> str:
+    return min(teams, key=lambda team: (store.team_total(team), store.team_size(team)))
+
+
+TEAM_POLICIES = {
+    "alternate":   alternate,
+    "least-count": least_count,
+    "least-score": least_score,
+}
+
+
+class TeamBalancer:
+    def __init__(self, policy="alternate", teams=TEAMS):
+        if callable(policy):
+            self.policy = policy
+        else:
+            try:
+                self.policy = TEAM_POLICIES[policy]
+            except KeyError:
+                raise ValueError(f"unknown team policy {policy!r} "
+                                 f"(choose from {', '.join(TEAM_POLICIES)})") from None
+        self.teams  = tuple(teams)
+        self.joined = 0                       # players placed so far
+
+    def pick(self, store) -> str:
+        team = self.policy(store, self.teams, self.joined)
+        self.joined += 1
+        return team
+
+    def reset(self):
+        self.joined = 0
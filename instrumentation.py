@@ -0,0 +1,140 @@
+"""
+instrumentation.py
+------------------
+Optional, low-overhead latency instrumentation for the engine pipeline.
+
+Stages timed (all with time.perf_counter_ns):
+- ingest      socket wakeup -> batch parsed and on event_queue
+- queue_wait  on event_queue -> picked up by process_pending_events()
+- apply       one _apply_hit() call
+- send_wait   queued for sending -> sendto() done in _send_loop
+- end_to_end  datagram received -> acknowledgement sent
+
+Plus queue-depth gauges for event_queue and send_queue.
+
+Latencies go into fixed-size log-linear histograms (8 sub-buckets per
+power of two, ~12% resolution), so recording is a couple of integer ops
+and memory never grows. When the engine's `metrics` is None none of this
+runs; the hot path only pays for an `is None` check.
+"""
+
+import json
+import time
+from array import array
+from collections import deque
+
+SUB_BITS    = 3                  # 8 sub-buckets per power of two
+SUB_COUNT   = 1 << SUB_BITS
+N_BUCKETS   = 512                # covers well past an hour in ns
+
+STAGES = ("ingest", "queue_wait", "apply", "send_wait", "end_to_end")
+
+
+def _bucket(ns: int) -> int:
+    if ns < SUB_COUNT:
+        return ns if ns > 0 else 0
+    shift = ns.bit_length() - 1 - SUB_BITS
+    b = (shift << SUB_BITS) + (ns >> shift)
+    return b if b < N_BUCKETS else N_BUCKETS - 1
+
+
+def _bucket_floor(b: int) -> int:
+    if b < SUB_COUNT:
+        return b
+    shift = (b >> SUB_BITS) - 1
+    return ((b & (SUB_COUNT - 1)) | SUB_COUNT) << shift
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * N_BUCKETS))
+        self.count  = 0
+        self.total  = 0      # ns, for the mean
+        self.max    = 0
+
+    def record(self, ns: int):
+        self.counts[_bucket(ns)] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, pct: float) -> int:
+        """Approximate latency (ns) at the given percentile (lower bucket edge)."""
+        if not self.count:
+            return 0
+        rank = max(1, round(pct / 100.0 * self.count))
+        seen = 0
+        for b, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return _bucket_floor(b)
+        return self.max
+
+    def summary(self) -> dict:
+        """Counts and latencies in microseconds."""
+        return {
+            "count": self.count,
+            "mean_us": round(self.total / self.count / 1000, 2) if self.count else 0.0,
+            "p50_us": round(self.percentile(50) / 1000, 2),
+            "p90_us": round(self.percentile(90) / 1000, 2),
+            "p99_us": round(self.percentile(99) / 1000, 2),
+            "max_us": round(self.max / 1000, 2),
+        }
+
+
+class Gauge:
+    def __init__(self):
+        self.last    = 0
+        self.max     = 0
+        self.total   = 0
+        self.samples = 0
+
+    def sample(self, value: int):
+        self.last = value
+        self.total += value
+        self.samples += 1
+        if value > self.max:
+            self.max = value
+
+    def summary(self) -> dict:
+        return {
+            "last": self.last,
+            "max": self.max,
+            "mean": round(self.total / self.samples, 2) if self.samples else 0.0,
+        }
+
+
+class EngineMetrics:
+    """Per-stage histograms + queue gauges for one engine run."""
+
+    def __init__(self):
+        self.stages = {name: LatencyHistogram() for name in STAGES}
+        self.event_queue_depth = Gauge()
+        self.send_queue_depth  = Gauge()
+        # Receive timestamps of event_queue items, in queue order (one producer)
+        self.queued_stamps: deque[int] = deque()
+        self.started_at = time.time()
+
+    def record(self, stage: str, ns: int):
+        self.stages[stage].record(ns)
+
+    def snapshot(self) -> dict:
+        """Plain dict for a diagnostics panel or a JSON dump."""
+        return {
+            "started_at": self.started_at,
+            "uptime_s": round(time.time() - self.started_at, 3),
+            "stages": {name: h.summary() for name, h in self.stages.items()},
+            "event_queue_depth": self.event_queue_depth.summary(),
+            "send_queue_depth": self.send_queue_depth.summary(),
+        }
+
+    def dump(self, path: str):
+        """Write snapshot() plus the raw histogram buckets to a JSON file."""
+        data = self.snapshot()
+        data["buckets"] = {
+            name: {str(_bucket_floor(b)): n for b, n in enumerate(h.counts) if n}
+            for name, h in self.stages.items()
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
@@ -0,0 +1,69 @@
+"""
+kill_feed.py
+------------
+Bounded ring buffer of scoring events for a live "kill feed".
+
+The engine pushes one small tuple per scoring hit from _apply_slots (no
+string formatting on that path). A display drains the buffer on its own
+schedule and formats what it shows. If nobody drains for a while the
+oldest entries are overwritten and counted in `dropped`, so memory stays
+flat however long the game runs.
+
+    feed = KillFeed()
+    feed.push(ENEMY_HIT, "Alice", "Bob", 10)
+    for entry in feed.drain():
+        print(format_entry(entry))
+"""
+
+from collections import deque
+
+FEED_CAPACITY = 2000    # entries kept between drains
+
+ENEMY_HIT     = "hit"
+FRIENDLY_FIRE = "friendly"
+BASE_43       = "base_43"   # red attacker scored on the green base
+BASE_53       = "base_53"   # green attacker scored on the red base
+
+FEED_TEMPLATES = {
+    ENEMY_HIT:     "{attacker} hit {target} (+{points})",
+    FRIENDLY_FIRE: "{attacker} hit teammate {target} (-{points} each)",
+    BASE_43:       "{attacker} captured the green base (+{points})",
+    BASE_53:       "{attacker} captured the red base (+{points})",
+}
+
+
+class KillFeed:
+    def __init__(self, capacity: int = FEED_CAPACITY):
+        self._buf: deque = deque(maxlen=capacity)
+        self.pushed  = 0    # entries ever pushed
+        self.dropped = 0    # overwritten before anyone drained them
+
+    def __len__(self):
+        return len(self._buf)
+
+    def push(self, kind: str, attacker: str, target: str | None = None, points: int = 0):
+        buf = self._buf
+        if len(buf) == buf.maxlen:
+            self.dropped += 1
+        buf.append((kind, attacker, target, points))
+        self.pushed += 1
+
+    def drain(self) -> list[tuple]:
+        """Remove and return everything buffered, oldest first."""
+        entries = []
+        popleft = self._buf.popleft
+        try:
+            while True:
+                entries.append(popleft())
+        except IndexError:
+            pass
+        return entries
+
+    def clear(self):
+        self._buf.clear()
+
+
+def format_entry(entry) -> str:
+    kind, attacker, target, points = entry
+    return FEED_TEMPLATES.get(kind, "{attacker} {target}").format(
+        attacker=attacker, target=target, points=points)
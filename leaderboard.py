@@ -0,0 +1,75 @@
+"""
+leaderboard.py
+--------------
+Score-ordered index of player slots, kept current as scores change.
+
+Entries are (-score, slot) keys in a sorted Python list, so the best
+score is first and ties keep join (slot) order. A score change finds the
+old key with bisect and re-inserts with insort: O(log n) comparisons plus
+a memmove of the pointer array, which for arena-sized rosters (tens to a
+few thousand players) is far cheaper than any per-node tree in Python.
+
+- top(k)     best k (slot, score) pairs, O(k)
+- rank(slot) 1-based competition rank (equal scores share a rank), O(log n)
+"""
+
+from bisect import bisect_left, insort
+
+
+class Leaderboard:
+    def __init__(self):
+        self._keys: list[tuple[int, int]] = []    # (-score, slot), best first
+        self._score: dict[int, int] = {}           # slot -> score as filed
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, slot):
+        return slot in self._score
+
+    def add(self, slot: int, score: int = 0):
+        if slot in self._score:
+            self.update(slot, score)
+            return
+        self._score[slot] = score
+        insort(self._keys, (-score, slot))
+
+    def remove(self, slot: int):
+        score = self._score.pop(slot, None)
+        if score is None:
+            return
+        keys = self._keys
+        del keys[bisect_left(keys, (-score, slot))]
+
+    def update(self, slot: int, score: int):
+        old = self._score.get(slot)
+        if old is None or old == score:
+            return
+        keys = self._keys
+        i = bisect_left(keys, (-old, slot))
+        key = (-score, slot)
+        if (i == 0 or keys[i - 1] < key) and (i + 1 == len(keys) or key < keys[i + 1]):
+            keys[i] = key                   # still between its neighbours: no shift
+        else:
+            del keys[i]
+            insort(keys, key)
+        self._score[slot] = score
+
+    def clear(self):
+        self._keys.clear()
+        self._score.clear()
+
+    # ---------------------------
+    # Queries
+    # ---------------------------
+    def top(self, k: int | None = None) -> list[tuple[int, int]]:
+        """Best k entries as (slot, score), highest score first."""
+        keys = self._keys if k is None else self._keys[:k]
+        return [(slot, -neg) for neg, slot in keys]
+
+    def rank(self, slot: int) -> int | None:
+        """1-based rank of slot; players on equal scores share the better rank."""
+        score = self._score.get(slot)
+        if score is None:
+            return None
+        return bisect_left(self._keys, (-score,)) + 1
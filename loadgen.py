@@ -0,0 +1,321 @@
+"""
+loadgen.py
+----------
+Localhost stand-in for the course traffic generator, plus an end-to-end
+load benchmark for the engine. No hardware needed.
+
+Like the real generator it sends "ATTACKER:TARGET" datagrams to the
+engine's receive port (7501) and listens for the engine's replies on 7500.
+Unlike it, it fires at a configurable rate and mixes in base hits,
+friendly fire and malformed packets, then reports:
+
+- sustained events/s (acknowledged events over the measured window)
+- packet loss (events whose acknowledgement never came back)
+- p50 / p99 / max latency from send to acknowledgement. The engine sends
+  its per-hit broadcast from _apply_hit, i.e. after the score is applied,
+  so this is send -> applied score -> ack.
+
+By default an engine is started in-process, N players are registered,
+and an engine.EventPump thread stands in for the UI (woken by
+on_events_ready, then process_pending_events()). Use --external to load
+an engine that is already running, passing its hardware IDs with --ids.
+
+Examples:
+    python loadgen.py --players 20 --rate 5000 --duration 10
+    python loadgen.py --external --ids hw0x0001:red hw0x0002:green --rate 500
+"""
+
+import argparse
+import collections
+import contextlib
+import io
+import random
+import socket
+import threading
+import time
+
+ACK_PORT    = 7500   # engine sends here (we listen)
+TARGET_PORT = 7501   # engine receives here (we send)
+
+IGNORED_TOKENS = {"202", "221"}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+class LoadGenerator:
+    def __init__(self, players, host="127.0.0.1", target_port=TARGET_PORT, ack_port=ACK_PORT,
+                 rate=1000, duration=10.0, friendly=0.1, base=0.05, malformed=0.01,
+                 drain_timeout=2.0, seed=None):
+        self.players     = players          # list of (hw_id, team)
+        self.target      = (host, target_port)
+        self.ack_port    = ack_port
+        self.rate        = rate             # events per second
+        self.duration    = duration         # seconds of firing
+        self.friendly    = friendly         # fraction of friendly-fire hits
+        self.base        = base             # fraction of base hits (43/53)
+        self.malformed   = malformed        # fraction of junk packets
+        self.drain_timeout = drain_timeout  # how long to wait for late acks
+        self.rng = random.Random(seed)
+
+        # Per-event bookkeeping (index = event id)
+        self.sent_at:  list[int]  = []      # perf_counter_ns at send
+        self.acked_at: list[int]  = []      # perf_counter_ns of first ack, 0 = none
+        self.kinds:    list[str]  = []
+        # ack token -> FIFO of event ids still waiting for that token
+        self._waiting: dict[str, collections.deque] = collections.defaultdict(collections.deque)
+        self._lock = threading.Lock()
+
+        self.start_code_seen = threading.Event()
+        self._stop = threading.Event()
+        self.unmatched_acks = 0
+
+        self.ack_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.ack_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22)
+        self.ack_sock.bind(("0.0.0.0", ack_port))
+        self.ack_sock.settimeout(0.2)
+
+    # ---------------------------
+    # Traffic plan
+    # ---------------------------
+    def _make_event(self):
+        """Return (payload, kind, expected ack tokens)."""
+        r = self.rng.random()
+        hw_id, team = self.rng.choice(self.players)
+
+        if r < self.malformed:
+            if self.rng.random() < 0.5:
+                return b"garbage-no-colon", "malformed", ("OK",)
+            return f"{hw_id}:".encode(), "malformed", ("ERR:bad-format",)
+        r -= self.malformed
+
+        if r < self.base:
+            code = "43" if team == "red" else "53"
+            return f"{hw_id}:{code}".encode(), "base", (code,)
+        r -= self.base
+
+        same = [p for p in self.players if p[1] == team and p[0] != hw_id]
+        other = [p for p in self.players if p[1] != team]
+        if r < self.friendly and same:
+            mate = self.rng.choice(same)[0]
+            return f"{hw_id}:{mate}".encode(), "friendly", (hw_id, mate)
+        if other:
+            enemy = self.rng.choice(other)[0]
+            return f"{hw_id}:{enemy}".encode(), "hit", (enemy,)
+        mate = self.rng.choice(same)[0]
+        return f"{hw_id}:{mate}".encode(), "friendly", (hw_id, mate)
+
+    # ---------------------------
+    # Run
+    # ---------------------------
+    def run(self, wait_for_start=True) -> dict:
+        receiver = threading.Thread(target=self._ack_loop, daemon=True, name="loadgen-acks")
+        receiver.start()
+
+        if wait_for_start and not self.start_code_seen.wait(timeout=10.0):
+            print("[loadgen] no start code (202) seen; firing anyway")
+
+        send_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        send_sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 22)
+
+        total = int(self.rate * self.duration)
+        plan = [self._make_event() for _ in range(total)]
+        self.sent_at  = [0] * total
+        self.acked_at = [0] * total
+        self.kinds    = [kind for _, kind, _ in plan]
+
+        interval = 1.0 / self.rate if self.rate > 0 else 0.0
+        t_start = time.perf_counter()
+        for i, (payload, kind, tokens) in enumerate(plan):
+            # Pace against the schedule, sending in bursts when behind
+            due = t_start + i * interval
+            delay = due - time.perf_counter()
+            if delay > 0.0005:
+                time.sleep(delay)
+            with self._lock:
+                for token in tokens:
+                    self._waiting[token].append(i)
+                self.sent_at[i] = time.perf_counter_ns()
+            try:
+                send_sock.sendto(payload, self.target)
+            except OSError:
+                pass
+        t_sent = time.perf_counter()
+
+        # Let late acks arrive, stop once everything is in or we time out
+        deadline = time.perf_counter() + self.drain_timeout
+        while time.perf_counter() < deadline and 0 in self.acked_at:
+            time.sleep(0.05)
+        self._stop.set()
+        receiver.join()
+        send_sock.close()
+        self.ack_sock.close()
+        return self._report(t_start, t_sent)
+
+    def _ack_loop(self):
+        while not self._stop.is_set():
+            try:
+                data = self.ack_sock.recv(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            now = time.perf_counter_ns()
+            token = data.decode(errors="ignore").strip()
+            if token == "202":
+                self.start_code_seen.set()
+            if token in IGNORED_TOKENS or token.startswith("REG:"):
+                continue
+            with self._lock:
+                fifo = self._waiting.get(token)
+                if not fifo:
+                    self.unmatched_acks += 1
+                    continue
+                event_id = fifo.popleft()
+                if not self.acked_at[event_id]:
+                    self.acked_at[event_id] = now
+
+    def _report(self, t_start, t_sent) -> dict:
+        sent = len(self.sent_at)
+        acked = [i for i in range(sent) if self.acked_at[i]]
+        latencies = sorted((self.acked_at[i] - self.sent_at[i]) / 1e6 for i in acked)
+        last_ack = max((self.acked_at[i] for i in acked), default=0)
+        window = (last_ack / 1e9 - t_start) if acked else 0.0
+
+        by_kind = collections.Counter(self.kinds)
+        lost_by_kind = collections.Counter(self.kinds[i] for i in range(sent) if not self.acked_at[i])
+        return {
+            "sent": sent,
+            "acked": len(acked),
+            "lost": sent - len(acked),
+            "loss_pct": 100.0 * (sent - len(acked)) / sent if sent else 0.0,
+            "offered_rate": sent / (t_sent - t_start) if t_sent > t_start else 0.0,
+            "sustained_eps": len(acked) / window if window > 0 else 0.0,
+            "p50_ms": percentile(latencies, 50),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": latencies[-1] if latencies else 0.0,
+            "unmatched_acks": self.unmatched_acks,
+            "by_kind": dict(by_kind),
+            "lost_by_kind": dict(lost_by_kind),
+        }
+
+
+# ---------------------------
+# In-process engine harness
+# ---------------------------
+class EngineHarness:
+    """Runs a GameEngine in this process with an EventPump thread standing in for the UI."""
+
+    def __init__(self, n_players, recv_port=TARGET_PORT, send_port=ACK_PORT, game_time=600,
+                 engine_cls=None):
+        from engine import EventPump
+        if engine_cls is None:
+            from engine import GameEngine as engine_cls
+        self.engine = engine_cls(ip="127.0.0.1", send_port=send_port,
+                                 recv_port=recv_port, game_time=game_time)
+        for i in range(n_players):
+            self.engine.join_player(f"load{i:04d}")
+        self._pump = EventPump(self.engine)
+
+    @property
+    def players(self):
+        return [(p.hw_id, p.team) for p in self.engine.players.values()]
+
+    def start(self):
+        self._pump.start("loadgen-ui")
+        self.engine.start_game()
+
+    def stop(self):
+        self.engine.stop_game()
+        self._pump.stop()
+        self.engine.process_pending_events()    # last hits; finishes journal and results
+
+
+def print_report(report, engine=None):
+    print("---- loadgen report ----")
+    print(f"sent            {report['sent']}  ({report['offered_rate']:.0f}/s offered)")
+    print(f"acknowledged    {report['acked']}")
+    print(f"lost            {report['lost']}  ({report['loss_pct']:.2f}%)  {report['lost_by_kind']}")
+    print(f"sustained       {report['sustained_eps']:.0f} events/s")
+    print(f"latency ms      p50={report['p50_ms']:.3f}  p99={report['p99_ms']:.3f}  max={report['max_ms']:.3f}")
+    print(f"mix             {report['by_kind']}")
+    if report["unmatched_acks"]:
+        print(f"unmatched acks  {report['unmatched_acks']}")
+    if engine is not None and hasattr(engine, "ingest_stats"):
+        print(f"engine ingest   {engine.ingest_stats.snapshot()}")
+    if engine is not None and hasattr(engine, "send_stats"):
+        print(f"engine send     {engine.send_stats.snapshot()}")
+    if engine is not None and hasattr(engine, "queue_stats"):
+        for name, stats in engine.queue_stats().items():
+            print(f"engine {name:<11} {stats}")
+    if engine is not None and getattr(engine, "metrics", None) is not None:
+        for stage, summary in engine.metrics_snapshot()["stages"].items():
+            print(f"stage {stage:<11} {summary}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Localhost traffic generator / engine load benchmark.")
+    parser.add_argument("--players", type=int, default=20, help="players to register (in-process mode)")
+    parser.add_argument("--rate", type=float, default=2000, help="events per second")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of firing")
+    parser.add_argument("--friendly", type=float, default=0.1, help="fraction of friendly-fire hits")
+    parser.add_argument("--base", type=float, default=0.05, help="fraction of base hits (43/53)")
+    parser.add_argument("--malformed", type=float, default=0.01, help="fraction of malformed packets")
+    parser.add_argument("--host", default="127.0.0.1", help="engine host")
+    parser.add_argument("--target-port", type=int, default=TARGET_PORT, help="engine receive port")
+    parser.add_argument("--ack-port", type=int, default=ACK_PORT, help="port the engine sends to")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--no-wait-start", action="store_true", help="don't wait for the 202 start code")
+    parser.add_argument("--asyncio", action="store_true", help="use the asyncio engine in-process")
+    parser.add_argument("--external", action="store_true", help="load an already-running engine")
+    parser.add_argument("--ids", nargs="*", default=[], metavar="HWID:TEAM",
+                        help="hardware IDs and teams of the external engine's players")
+    parser.add_argument("--metrics", metavar="FILE", default=None,
+                        help="enable engine stage metrics and dump them to FILE (in-process mode)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show engine output")
+    args = parser.parse_args(argv)
+
+    harness = None
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        if not args.verbose:
+            from engine import engine_log
+            from event_log import ERROR
+            engine_log.set_level(ERROR)     # per-hit records would dominate the run
+
+        if args.external:
+            players = [tuple(spec.split(":", 1)) for spec in args.ids]
+            if len(players) < 2:
+                parser.error("--external needs at least two --ids HWID:TEAM")
+        else:
+            engine_cls = None
+            if args.asyncio:
+                from engine_async import AsyncGameEngine as engine_cls
+            harness = EngineHarness(args.players, recv_port=args.target_port, send_port=args.ack_port,
+                                    engine_cls=engine_cls)
+            players = harness.players
+            if args.metrics:
+                harness.engine.enable_metrics(args.metrics)
+
+        gen = LoadGenerator(players, host=args.host, target_port=args.target_port, ack_port=args.ack_port,
+                            rate=args.rate, duration=args.duration, friendly=args.friendly,
+                            base=args.base, malformed=args.malformed, seed=args.seed)
+
+        if harness:
+            harness.start()
+        try:
+            report = gen.run(wait_for_start=not args.no_wait_start)
+        finally:
+            if harness:
+                harness.stop()
+
+    print_report(report, harness.engine if harness else None)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,38 +3,96 @@
 Main entry point for the Photon Game.
 
 - Creates QApplication (Qt event loop).
-- Builds the ScoreboardWindow (UI).
-- Starts splash screen.
+- Shows the splash screen right away.
+- Loads the players table on a background thread (psycopg2 is only
+  imported there, never on the startup path).
+- Builds the ScoreboardWindow (UI) and shows it as soon as it is ready.
 - Starts UDPTransport + GameCore (backend).
-- Uses a QTimer to:
-    * Pull new events from UDPTransport.event_queue
-    * Process them with GameCore (updates state + DB)
-    * Refresh the scoreboard UI
+- Saves each finished match to the database in the background
+  (match_history.ResultWriter); pending saves are flushed on exit.
+- Engine wakes the UI (Qt signal) whenever hits arrive, which then:
+    * Pulls new events from the engine's event_queue
+    * Processes them (updates state)
+    * Refreshes the scoreboard UI
+
+A startup report ("[startup] ...") breaks down where launch time went:
+Qt import, splash, engine import, window build, and the background DB
+load when it finishes.
 """
 
-import sys, time
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import QTimer
+import time
+_T0 = time.perf_counter()                                           # before any heavy import
+
+import sys
+import threading
+
+
+class StartupTimer:
+    """Wall-clock breakdown of startup stages, in milliseconds."""
+
+    def __init__(self, t0: float):
+        self.t0 = t0
+        self._last = t0
+        self.stages: list[tuple[str, float]] = []
+
+    def mark(self, stage: str):
+        now = time.perf_counter()
+        self.stages.append((stage, (now - self._last) * 1000))
+        self._last = now
+
+    def report(self) -> str:
+        total = (self._last - self.t0) * 1000
+        parts = " | ".join(f"{stage} {ms:.0f} ms" for stage, ms in self.stages)
+        return f"[startup] {parts} | window ready {total:.0f} ms"
+
+
+def preload_roster(timer: StartupTimer):
+    """Background: import the DB driver and load the players table once."""
+    t = time.perf_counter()
+    try:
+        import roster_cache
+        count = roster_cache.preload()
+        print(f"[main] Roster cache loaded: {count} players")
+    except Exception as e:
+        print(f"[main] Roster preload failed (lookups will hit the DB): {e}")
+    print(f"[startup] db init (background) {(time.perf_counter() - t) * 1000:.0f} ms, "
+          f"done {(time.perf_counter() - timer.t0) * 1000:.0f} ms after launch")
 
-from qt_ui import ScoreboardWindow, Start_App   # <-- your old qt_header.py (rename to qt_ui.py)
-from engine_mk2 import GameEngine                   # <-- new consolidated game logic -- CHANGE 'engine' to 'engine_mk2' to test new engine
 
 def main():
-    # --- Start Qt app ---
+    timer = StartupTimer(_T0)
+
+    # --- Start Qt app and put the splash up before anything else loads ---
+    from PyQt5.QtWidgets import QApplication
     app = QApplication(sys.argv)
+    timer.mark("qt import")
+
+    from qt_ui import ScoreboardWindow, Start_App, Show_Splash   # <-- your old qt_header.py (rename to qt_ui.py)
+    splash = Show_Splash()
+    timer.mark("splash")
+
+    # --- Load the players table off the GUI thread; ID lookups are in-memory afterwards ---
+    threading.Thread(target=preload_roster, args=(timer,), daemon=True, name="roster-preload").start()
 
     # --- Create engine (but don’t start yet) ---
-    engine = GameEngine()
+    from engine import GameEngine                       # <-- consolidated game logic (engine_mk2 lacks the scoreboard change tracking the UI needs)
+    from match_history import ResultWriter
+    results = ResultWriter()                            # match results -> Postgres, off the GUI thread
+    engine = GameEngine(results_writer=results)
+    timer.mark("engine import")
 
     # --- Create main window and pass engine reference ---
     window = ScoreboardWindow(engine)
-    Start_App(app, window)
-
+    timer.mark("window build")
+    Start_App(app, window, splash)
+    timer.mark("show")
+    print(timer.report())
 
     # --- Run app event loop ---
-    sys.exit(app.exec())
+    status = app.exec()
+    results.close()                                     # let a just-finished match finish saving
+    sys.exit(status)
 
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,173 @@
+"""
+match_history.py
+----------------
+Post-game persistence of match results to PostgreSQL, off the game and
+UI threads.
+
+When the game stops, the engine hands match_summary(engine) to its
+ResultWriter. That snapshot holds only plain values: times, team totals
+and one row per player from export_stats(). A background thread writes
+each summary with db_helper.save_match() in one transaction, using
+batched inserts for the result rows. submit() only queues, so the engine
+never waits on Postgres.
+
+Per-event rows are optional (events=True). They are taken from the
+match journal, so the engine needs a journal_path. The journal's size is
+recorded at stop time and the writer decodes that last match in the
+background.
+
+psycopg2 / db_helper are imported on the writer thread, on first use.
+
+    writer = ResultWriter(events=True)
+    engine = GameEngine(journal_path="match.jrnl", results_writer=writer)
+    ...
+    writer.close()          # at exit: wait for pending matches to be saved
+"""
+
+import os
+import queue
+import threading
+import time
+
+from kill_feed import ENEMY_HIT, FRIENDLY_FIRE, BASE_43, BASE_53
+
+NO_SCORE = "no_score"   # a base hit by the wrong team (journaled, not scored)
+
+
+def match_summary(engine) -> dict:
+    """Plain-value snapshot of a finished match (cheap; safe to hand to another thread)."""
+    journal_path = engine.journal_path
+    journal_end = None
+    if journal_path:
+        try:
+            journal_end = os.path.getsize(journal_path)
+        except OSError:
+            journal_path = None
+    players = engine.export_stats()
+    for row in players:
+        row["player_id"] = engine.players[row["hw_id"]].player_id
+    return {
+        "started_at": engine.started_at,
+        "ended_at": time.time(),
+        "game_time": engine.game_time,
+        "totals": {team: engine.team_total(team) for team in engine.scores.team_names},
+        "players": players,
+        "journal_path": journal_path,
+        "journal_end": journal_end,
+    }
+
+
+def journal_events(path: str, end: int | None = None) -> list[tuple]:
+    """
+    Hits of the last match in a journal, as
+    (seq, t_ms, attacker_hw_id, target, kind, points) rows.
+
+    Only the bytes before `end` are read, so a match appended later is ignored.
+    target is a hw_id or "43" / "53". kind is a kill_feed kind, or
+    NO_SCORE for a base hit by the wrong team.
+    """
+    from engine import NORMAL_HIT_POINTS, BASE_43_POINTS, BASE_53_POINTS, TARGET_BASE_43, TARGET_BASE_53
+    from match_journal import RECORD, RECORD_SIZE, TEAM, REGISTER, UNREGISTER, HIT, last_match_offset
+
+    with open(path, "rb") as f:
+        data = f.read() if end is None else f.read(end)
+    usable = len(data) - len(data) % RECORD_SIZE
+
+    # Start at the last header (same rule as replay()): the journal is appended to across matches
+    start = last_match_offset(data, usable)
+
+    team_names: dict[int, str] = {}
+    hw_id_of: dict[int, str] = {}
+    team_of: dict[int, str] = {}
+    events = []
+    view = memoryview(data)[start:usable]
+    for t_ns, kind, team, aux, a, b, payload in RECORD.iter_unpack(view):
+        if kind == HIT:
+            attacker = hw_id_of.get(a)
+            if attacker is None:
+                continue
+            if b == TARGET_BASE_43:
+                scored = team_of[a] == "red"
+                row = ("43", BASE_43 if scored else NO_SCORE, BASE_43_POINTS if scored else 0)
+            elif b == TARGET_BASE_53:
+                scored = team_of[a] == "green"
+                row = ("53", BASE_53 if scored else NO_SCORE, BASE_53_POINTS if scored else 0)
+            elif b in hw_id_of:
+                if team_of[a] == team_of[b]:
+                    row = (hw_id_of[b], FRIENDLY_FIRE, -10)
+                else:
+                    row = (hw_id_of[b], ENEMY_HIT, NORMAL_HIT_POINTS)
+            else:
+                continue
+            events.append((len(events), t_ns // 1_000_000, attacker) + row)
+        elif kind == TEAM:
+            team_names[team] = payload.rstrip(b"\0").decode(errors="replace")
+        elif kind == REGISTER:
+            hw_id_of[a] = payload.rstrip(b"\0").decode(errors="replace")
+            team_of[a] = team_names.get(team, str(team))
+        elif kind == UNREGISTER:
+            hw_id_of.pop(a, None)
+            team_of.pop(a, None)
+    return events
+
+
+class ResultWriter:
+    """Background thread that saves match summaries, one transaction each."""
+
+    def __init__(self, events: bool = False, log=None):
+        self.events = events
+        self.log = log              # EventLogger; None = print
+        self.saved  = 0             # matches written
+        self.failed = 0             # matches that could not be written
+        self._queue: queue.Queue[dict | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, summary: dict):
+        """Queue a match_summary() for saving. Returns at once."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="results")
+                self._thread.start()
+        self._queue.put(summary)
+
+    def close(self, timeout: float = 10.0):
+        """Stop the thread once everything queued so far is saved (or timeout passes)."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        ready = False
+        while True:
+            summary = self._queue.get()
+            if summary is None:
+                return
+            try:
+                import db_helper    # psycopg2 only ever loads on this thread
+                if not ready:
+                    db_helper.init_history_tables()
+                    ready = True
+                events = None
+                if self.events and summary.get("journal_path"):
+                    events = journal_events(summary["journal_path"], summary.get("journal_end"))
+                match_id = db_helper.save_match(summary, events)
+            except Exception as e:
+                self.failed += 1
+                self._report("results_error", f"[match_history] save failed: {e}", error=e)
+                continue
+            self.saved += 1
+            self._report("results_saved", f"[match_history] saved match {match_id}",
+                         match_id=match_id, players=len(summary["players"]),
+                         events=len(events) if events is not None else 0)
+
+    def _report(self, event: str, text: str, **fields):
+        if self.log is None:
+            print(text)
+        elif event == "results_error":
+            self.log.error(event, **fields)
+        else:
+            self.log.info(event, **fields)
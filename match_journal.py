@@ -0,0 +1,300 @@
+"""
+match_journal.py
+----------------
+Append-only binary journal of a match, and fast replay.
+
+Every record is 32 bytes, little-endian (struct "<qBBhii12s"):
+
+    t_ns     int64   ns since the journal was opened (wall-clock epoch ns
+                     in the header record)
+    kind     uint8   HEADER / TEAM / REGISTER / NAME / UNREGISTER / HIT / CONTROL
+                     / STATE
+    team     uint8   team index (TEAM, REGISTER)
+    aux      int16   chunk number (NAME), STATE_FIELDS index (STATE)
+    a        int32   player slot (REGISTER/NAME/UNREGISTER/HIT/STATE), code
+                     (CONTROL), format version (HEADER)
+    b        int32   target: player slot or -43 / -53 (HIT)
+    payload  12s     magic (HEADER), team name (TEAM), hw_id (REGISTER),
+                     12-byte username chunk (NAME), int64 value (STATE)
+
+Slots are the engine's ScoreStore slots at the time of recording. Hits are
+journaled as they are applied, so replay re-runs the scoring rules over the
+same inputs in the same order.
+
+Writing: JournalWriter appends records to an in-memory bytearray under a
+short lock; a background thread writes that buffer to disk every
+flush_interval (or once it passes flush_bytes), so the scoring thread never
+touches the file.
+
+Each start_game() appends a new match to the same file. A match starts
+with its own HEADER, whose t_ns is that match's wall-clock epoch. Later
+t_ns values count from that header. Next comes the roster, plus STATE
+records for any score or counters players carry over from earlier
+matches, so every match can be read on its own.
+
+Reading: read_records() yields decoded records. replay() rebuilds a
+GameEngine's roster and scores from the last match in the file. Replay
+runs struct.iter_unpack over that match in memory with the scoring rules
+inlined; it makes no sends or logs.
+"""
+
+import os
+import struct
+import threading
+import time
+from array import array
+
+RECORD = struct.Struct("<qBBhii12s")
+RECORD_SIZE = RECORD.size                     # 32
+MAGIC = b"PHOTONJRNL01"
+VERSION = 1
+
+HEADER, TEAM, REGISTER, NAME, UNREGISTER, HIT, CONTROL, STATE = range(8)
+KIND_NAMES = ("header", "team", "register", "name", "unregister", "hit", "control", "state")
+
+# Per-player values a STATE record can restore (aux = index; last_hit in epoch ns)
+STATE_FIELDS = ("score", "hits", "hits_dealt", "hits_taken", "base_captures",
+                "friendly_fire", "streak", "longest_streak", "last_hit")
+STATE_VALUE = struct.Struct("<q4x")
+
+NAME_CHUNK = 12
+
+
+class JournalWriter:
+    def __init__(self, path: str, flush_interval: float = 0.1, flush_bytes: int = 1 << 16):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.records = 0
+
+        self._file = open(path, "ab")
+        self._buf = bytearray()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._t0 = time.perf_counter_ns()
+        self._teams: dict[str, int] = {}
+
+        self._append(HEADER, 0, 0, VERSION, 0, MAGIC, t_ns=time.time_ns())
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True, name="journal")
+        self._thread.start()
+
+    # ---------------------------
+    # Record types
+    # ---------------------------
+    def team(self, name: str) -> int:
+        idx = self._teams.get(name)
+        if idx is None:
+            idx = len(self._teams)
+            self._teams[name] = idx
+            self._append(TEAM, idx, 0, 0, 0, name.encode()[:NAME_CHUNK])
+        return idx
+
+    def register(self, slot: int, hw_id: str, username: str, team: str):
+        team_idx = self.team(team)
+        self._append(REGISTER, team_idx, 0, slot, 0, hw_id.encode()[:NAME_CHUNK])
+        name = username.encode()
+        for chunk, start in enumerate(range(0, max(len(name), 1), NAME_CHUNK)):
+            self._append(NAME, team_idx, chunk, slot, 0, name[start:start + NAME_CHUNK])
+
+    def state(self, slot: int, field: int, value: int):
+        """Carried-over value of STATE_FIELDS[field] for a registered slot."""
+        self._append(STATE, 0, field, slot, 0, STATE_VALUE.pack(value))
+
+    def unregister(self, slot: int):
+        self._append(UNREGISTER, 0, 0, slot, 0, b"")
+
+    def hit(self, attacker_slot: int, target_code: int):
+        data = RECORD.pack(time.perf_counter_ns() - self._t0, HIT, 0, 0,
+                           attacker_slot, target_code, b"")
+        with self._lock:
+            self._buf += data
+            self.records += 1
+        if len(self._buf) >= self.flush_bytes:
+            self._wake.set()
+
+    def control(self, code: int):
+        self._append(CONTROL, 0, 0, code, 0, b"")
+
+    # ---------------------------
+    # Buffering
+    # ---------------------------
+    def _append(self, kind, team, aux, a, b, payload, t_ns=None):
+        if t_ns is None:
+            t_ns = time.perf_counter_ns() - self._t0
+        data = RECORD.pack(t_ns, kind, team, aux, a, b, payload)
+        with self._lock:
+            self._buf += data
+            self.records += 1
+
+    def flush(self):
+        with self._lock:
+            data, self._buf = self._buf, bytearray()
+        if data and not self._file.closed:
+            self._file.write(data)
+            self._file.flush()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=1.0)
+        self.flush()
+        try:
+            os.fsync(self._file.fileno())
+        except OSError:
+            pass
+        self._file.close()
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except (OSError, ValueError):
+                break
+
+
+# ---------------------------
+# Reading / replay
+# ---------------------------
+def read_records(path: str):
+    """Yield (t_ns, kind_name, team, aux, a, b, payload) for every record."""
+    with open(path, "rb") as f:
+        data = f.read()
+    usable = len(data) - len(data) % RECORD_SIZE    # ignore a torn tail record
+    for t_ns, kind, team, aux, a, b, payload in RECORD.iter_unpack(memoryview(data)[:usable]):
+        yield t_ns, KIND_NAMES[kind] if kind < len(KIND_NAMES) else kind, team, aux, a, b, payload
+
+
+def last_match_offset(data, usable: int) -> int:
+    """Byte offset of the last HEADER record (0 if there is none)."""
+    for offset in range(usable - RECORD_SIZE, -1, -RECORD_SIZE):
+        if data[offset + 8] == HEADER:          # kind byte follows the int64 t_ns
+            return offset
+    return 0
+
+
+def replay(path: str, engine=None):
+    """
+    Rebuild players and scores of the last match in a journal into a GameEngine.
+
+    Returns the engine (a fresh, unstarted GameEngine if none is given).
+    Players keep their recorded hw_ids, usernames and teams; scores, hit
+    counters and combat statistics end up as they were when the journal
+    was closed.
+    """
+    # Lazy import: the engine imports this module for the writer
+    from engine import (GameEngine, NORMAL_HIT_POINTS, BASE_43_POINTS, BASE_53_POINTS,
+                        TARGET_BASE_43, TARGET_BASE_53)
+
+    with open(path, "rb") as f:
+        data = f.read()
+    usable = len(data) - len(data) % RECORD_SIZE
+    if usable < RECORD_SIZE or RECORD.unpack_from(data, 0)[6] != MAGIC:
+        raise ValueError(f"{path}: not a match journal")
+    start = last_match_offset(data, usable)
+    opened_ns = RECORD.unpack_from(data, start)[0]  # header: wall-clock epoch ns
+
+    team_names: dict[int, str] = {}
+    hw_ids: dict[int, str] = {}
+    names: dict[int, list[bytes]] = {}
+    registered_team: dict[int, int] = {}     # slot -> team index (live players only)
+
+    # Per journal slot; grown on demand
+    size = 64
+    scores  = array("q", bytes(8 * size))
+    hits    = array("q", bytes(8 * size))
+    team_of = array("i", [-1] * size)        # -1 = slot not registered
+    dealt, taken, bases, ff, streak, longest = (array("q", bytes(8 * size)) for _ in range(6))
+    last    = array("d", bytes(8 * size))
+
+    red = green = -2                         # team indexes, once seen
+    hit_kind = HIT
+
+    for t_ns, kind, team, aux, a, b, payload in RECORD.iter_unpack(memoryview(data)[start:usable]):
+        if kind == hit_kind:
+            ta = team_of[a] if 0 <= a < size else -1
+            if ta < 0:
+                continue
+            if b == TARGET_BASE_43 or b == TARGET_BASE_53:
+                if ta != (red if b == TARGET_BASE_43 else green):
+                    continue
+                scores[a] += BASE_43_POINTS if b == TARGET_BASE_43 else BASE_53_POINTS
+                hits[a] += 1
+                bases[a] += 1
+                streak[a] += 1
+            else:
+                tb = team_of[b] if 0 <= b < size else -1
+                if tb < 0:
+                    continue
+                dealt[a] += 1
+                taken[b] += 1
+                streak[b] = 0
+                if ta == tb:
+                    scores[a] -= 10
+                    scores[b] -= 10
+                    ff[a] += 1
+                    streak[a] = 0
+                else:
+                    scores[a] += NORMAL_HIT_POINTS
+                    hits[a] += 1
+                    streak[a] += 1
+            if streak[a] > longest[a]:
+                longest[a] = streak[a]
+            last[a] = (opened_ns + t_ns) / 1e9
+            continue
+
+        if kind == TEAM:
+            name = payload.rstrip(b"\0").decode(errors="replace")
+            team_names[team] = name
+            if name == "red":
+                red = team
+            elif name == "green":
+                green = team
+        elif kind == REGISTER:
+            while a >= size:
+                for counters in (scores, hits, dealt, taken, bases, ff, streak, longest):
+                    counters.extend([0] * size)
+                last.extend([0.0] * size)
+                team_of.extend([-1] * size)
+                size *= 2
+            hw_ids[a] = payload.rstrip(b"\0").decode(errors="replace")
+            names[a] = []
+            team_of[a] = team
+            for counters in (scores, hits, dealt, taken, bases, ff, streak, longest):
+                counters[a] = 0
+            last[a] = 0.0
+            registered_team[a] = team
+        elif kind == NAME:
+            names.setdefault(a, []).append(payload.rstrip(b"\0"))
+        elif kind == STATE:
+            if 0 <= a < size and team_of[a] >= 0 and aux < len(STATE_FIELDS):
+                value = STATE_VALUE.unpack_from(payload)[0]
+                if aux == len(STATE_FIELDS) - 1:            # last_hit, epoch ns
+                    last[a] = value / 1e9
+                else:
+                    (scores, hits, dealt, taken, bases, ff, streak, longest)[aux][a] = value
+        elif kind == UNREGISTER:
+            if 0 <= a < size:
+                team_of[a] = -1
+            registered_team.pop(a, None)
+
+    if engine is None:
+        engine = GameEngine()
+    for slot, team_idx in registered_team.items():
+        username = b"".join(names.get(slot, [])).decode(errors="replace")
+        player = engine.add_player(hw_ids[slot], username, team_names.get(team_idx, str(team_idx)))
+        player.score = scores[slot]
+        store, i = engine.scores, player.slot
+        store.hits[i] = hits[slot]
+        store.hits_dealt[i] = dealt[slot]
+        store.hits_taken[i] = taken[slot]
+        store.base_captures[i] = bases[slot]
+        store.friendly_fire[i] = ff[slot]
+        store.streak[i] = streak[slot]
+        store.longest_streak[i] = longest[slot]
+        store.last_hit[i] = last[slot]
+    return engine
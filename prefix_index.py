@@ -0,0 +1,54 @@
+"""
+prefix_index.py
+---------------
+Sorted-array prefix index for search-as-you-type.
+
+Entries are (key, value) tuples in one sorted Python list, with keys
+casefolded. All entries whose key starts with a prefix sit next to each
+other. bisect finds the first one, then the list is read until a key
+stops matching:
+
+- search(prefix, limit)   O(log n + k), no allocation beyond the result
+- add / remove            O(log n) search plus one list memmove
+
+Values can share a key (two players with the same codename); they sort by
+value within it.
+
+    index = PrefixIndex((codename, player_id) for player_id, codename in rows)
+    index.search("ali", 10)     # -> [player_id, ...] in codename order
+"""
+
+from bisect import bisect_left, insort
+
+
+class PrefixIndex:
+    def __init__(self, items=()):
+        self._entries: list[tuple[str, object]] = sorted((key.casefold(), value) for key, value in items)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, key: str, value):
+        insort(self._entries, (key.casefold(), value))
+
+    def remove(self, key: str, value):
+        entry = (key.casefold(), value)
+        entries = self._entries
+        i = bisect_left(entries, entry)
+        if i < len(entries) and entries[i] == entry:
+            del entries[i]
+
+    def search(self, prefix: str, limit: int | None = None) -> list:
+        """Values whose key starts with prefix (case-insensitive), in key order."""
+        prefix = prefix.casefold()
+        entries = self._entries
+        i = bisect_left(entries, (prefix,))
+        end = len(entries) if limit is None else min(len(entries), i + limit)
+        found = []
+        while i < end:
+            key, value = entries[i]
+            if not key.startswith(prefix):
+                break
+            found.append(value)
+            i += 1
+        return found
@@ -7,8 +7,23 @@ Responsibilities:
 - ScoreboardWindow: main QMainWindow for the app.
 - Build Settings Screen: where users configure and hit "Start Game."
 - Build Scoreboard Screen: shows live game results.
-- refresh_scoreboard(): pull player/score data from engine.state
-                        and redraw tables.
+- TeamTableModel: one table model per team; rows update in place.
+- EngineNotifier: carries the engine's "events ready" wakeup onto the
+                  GUI thread (no polling timer).
+- refresh_scoreboard(): push score changes from the engine into the
+                        team models (only changed rows repaint).
+- flush_feed():         move kill-feed entries from the engine's ring buffer
+                        into the message panel, at most FEED_FLUSH_MS apart.
+- Show_Splash() / Start_App(): splash goes up before the window is built
+                        and comes down as soon as the window is ready.
+
+Startup: nothing here imports the database driver. roster_cache (and
+psycopg2 behind it) is imported on the first player search, and the
+scoreboard page is built the first time it is shown.
+
+The "Players:" search box filters the players table as you type, from
+roster_cache's in-memory prefix index (no query per keystroke); picking a
+result adds that player to the game.
 
 Why keep this separate?
 - Keeps UI layout/styling isolated from game logic.
@@ -16,18 +31,19 @@ Why keep this separate?
 """
 
 # header.py
-import sys, json, time
+import sys
 from functools import partial
 
+from kill_feed import format_entry
+
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QTableWidget, QTableWidgetItem, QTextEdit, QSplashScreen,
-    QListWidget, QStackedWidget, QLineEdit, QApplication,
+    QTableView, QPlainTextEdit, QSplashScreen,
+    QListWidget, QListWidgetItem, QStackedWidget, QLineEdit, QApplication,
     QMainWindow, QSizePolicy
 )
 from PyQt5.QtGui import QPixmap, QFont
-from PyQt5.QtCore import Qt, QTimer
-from db_helper import search_player, add_player  # add this import
+from PyQt5.QtCore import Qt, QTimer, QObject, QAbstractTableModel, QModelIndex, pyqtSignal
 
 
 
@@ -74,6 +90,19 @@ def init_app():
 
 
 
+# Kill feed (message panel): batched, rate-limited appends with a fixed line cap
+FEED_FLUSH_MS        = 100                                                                  # at most one append to the panel per 100 ms
+FEED_LINES_PER_FLUSH = 200                                                                  # a bigger backlog is summarised, not rendered line by line
+FEED_MAX_LINES       = 1000                                                                 # oldest lines are trimmed past this
+
+# Player search box (settings page)
+SEARCH_RESULTS       = 20                                                                   # matches listed under the player search box
+
+
+class EngineNotifier(QObject):                                                              # thread-safe bridge: engine threads emit, GUI thread receives
+    eventsReady = pyqtSignal()
+
+
 class ScoreboardWindow(QMainWindow):                                                        # main window containing stacked settings and scoreboard pages
     def __init__(self, engine):
         super().__init__()
@@ -86,13 +115,33 @@ class ScoreboardWindow(QMainWindow):
         self.stack = QStackedWidget()                                                       # stack to hold multiple pages (settings + scoreboard)
         self.setCentralWidget(self.stack)                                                   # set stack as central widget of main window, allowing for page switching
 
+        # --- Team models (built once, updated in place) ---
+        self.red_model = TeamTableModel("red")
+        self.green_model = TeamTableModel("green")
+        self._roster_version = -1                                                           # engine.roster_version last loaded into the models
+
+        # --- Engine wakeups (replace the old 200 ms poll timer) ---
+        self.notifier = EngineNotifier(self)
+        self.notifier.eventsReady.connect(self._poll_events, Qt.QueuedConnection)          # queued: always runs on the GUI thread
+        self.engine.on_events_ready = self.notifier.eventsReady.emit                        # engine calls this (coalesced) when hits arrive
+
+        # --- Game clock: repaint the countdown label from engine.remaining() ---
+        self.clock_timer = QTimer(self)
+        self.clock_timer.setInterval(250)
+        self.clock_timer.timeout.connect(self._tick_clock)
+
+        # --- Kill feed: single-shot timer so bursts of hits become one append ---
+        self.feed_timer = QTimer(self)
+        self.feed_timer.setSingleShot(True)
+        self.feed_timer.setInterval(FEED_FLUSH_MS)
+        self.feed_timer.timeout.connect(self.flush_feed)
+
         # --- Build pages ---
         self.settings_page = Build_Settings_Screen(self.start_game, self.engine)            # settings page: consists of sidebar + sub-pages
-        self.scoreboard_page = Build_Scoreboard_Screen(self.go_to_settings)                 # scoreboard page: consists of team tables + message box
+        self.scoreboard_page = None                                                         # scoreboard page: built on first use (see _ensure_scoreboard)
 
         # --- Add pages to stack ---
-        self.stack.addWidget(self.settings_page)                                            # index 0
-        self.stack.addWidget(self.scoreboard_page)                                          # index 1
+        self.stack.addWidget(self.settings_page)                                            # index 0 (scoreboard becomes index 1 once built)
 
         # Show settings first
         self.stack.setCurrentIndex(0)
@@ -107,37 +156,74 @@ class ScoreboardWindow(QMainWindow):
     #         super().keyPressEvent(event)
 
 
+    def _ensure_scoreboard(self):
+        if self.scoreboard_page is None:                                                    # first visit: build team tables + message box now, not at startup
+            self.scoreboard_page = Build_Scoreboard_Screen(self.go_to_settings, self.red_model, self.green_model)
+            self.stack.addWidget(self.scoreboard_page)                                      # index 1
+        return self.scoreboard_page
+
     def start_game(self):
         self.engine.start_game()
+        self.reload_rosters()                                                               # load the rosters into the team models once per game
+        self._ensure_scoreboard()
         self.stack.setCurrentIndex(1)
+        self.clock_timer.start()
+        self._tick_clock()
+        self._poll_events()                                                                 # pick up anything that arrived before the signal was wired
+
+    def _tick_clock(self):
+        update_gametime(self.scoreboard_page.clock_label, self.engine.remaining())
+        if not self.engine.running:                                                         # game over (or stopped): leave the final time up
+            self.clock_timer.stop()
 
-        # Start poll timer here
-        self.poll_timer = QTimer(self)                                                      # poll: to regularly check for new events from the engine 
-        self.poll_timer.timeout.connect(self._poll_events)                                  # connect the timer's timeout signal to the _poll_events method
-        self.poll_timer.start(200)                                                          # poll every 200 ms
+    def _poll_events(self):                                                                 # runs once per engine wakeup; a burst of hits = one call
 
-    def _poll_events(self):
         self.engine.process_pending_events()                                                # process any pending events in the engine
         self.refresh_scoreboard()                                                           # refresh scoreboard to display accurate data
+        if len(self.engine.kill_feed) and not self.feed_timer.isActive():                   # new feed lines: schedule one batched append
+            self.feed_timer.start()
 
-    def refresh_scoreboard(self):
-        players = list(self.engine.players.values())                                        # refreshing scoreboard starts by creating a list of all players in the game
-
-        red_team = players[:len(players)//2]                                                # red team becomes the first half of the players list
-        green_team = players[len(players)//2:]                                              # green team becomes the second half of the players list
+    def flush_feed(self):
+        entries = self.engine.kill_feed.drain()
+        if not entries or self.scoreboard_page is None:
+            return
+        lines = []
+        skipped = len(entries) - FEED_LINES_PER_FLUSH
+        if skipped > 0:                                                                     # too many to render usefully: keep the newest
+            lines.append(f"... {skipped} earlier events not shown ...")
+            entries = entries[skipped:]
+        lines.extend(format_entry(e) for e in entries)
+        self.scoreboard_page.message_box.appendPlainText("\n".join(lines))                # one append (one layout pass) per flush
 
-        # clear old scoreboard_page and rebuild
-        self.stack.removeWidget(self.stack.widget(1))                                       # remove old scoreboard page from stack,
+    def refresh_scoreboard(self):
+        if self.engine.roster_version != self._roster_version:                              # someone joined/left: reload rows (rare)
+            self.reload_rosters()
+            return
 
-        # Rebuild scoreboard with current teams
-        self.scoreboard_page = Build_Scoreboard_Screen(self.go_to_settings, red_team, green_team)   # rebuild scoreboard page with current teams
-        self.stack.addWidget(self.scoreboard_page)                                          # add new scoreboard page to stack
-        self.stack.setCurrentIndex(1)                                                       # set current index to 1 to show the scoreboard page
+        for hw_id in self.engine.take_dirty_players():                                      # only players whose score changed since last refresh
+            player = self.engine.players.get(hw_id)
+            if player is None:
+                continue
+            model = self.red_model if player.team == "red" else self.green_model
+            model.update_player(player)                                                     # emits dataChanged for that one row
+
+        self.red_model.set_total(self.engine.team_total("red"))                             # engine keeps totals current; no summing here
+        self.green_model.set_total(self.engine.team_total("green"))
+
+    def reload_rosters(self):
+        players = list(self.engine.players.values())
+        self.red_model.set_players([p for p in players if p.team == "red"])
+        self.green_model.set_players([p for p in players if p.team != "red"])
+        self.red_model.set_total(self.engine.team_total("red"))
+        self.green_model.set_total(self.engine.team_total("green"))
+        self.engine.take_dirty_players()                                                    # models now hold current scores; discard stale marks
+        self._roster_version = self.engine.roster_version
 
     def go_to_settings(self):
         self.stack.setCurrentIndex(0)                                                       # traversal: switch to settings page
 
     def go_to_scoreboard(self):
+        self._ensure_scoreboard()
         self.stack.setCurrentIndex(1)                                                       # traversal: switch to scoreboard page
 
 
@@ -145,16 +231,23 @@ class ScoreboardWindow(QMainWindow):
 
 
 # Simply used for showing the splash screen
-def Start_App(app, window):
+def Show_Splash():
     splash = QLabel()                                                                       # splash screen is a QLabel; it will display an image
     pixmap = QPixmap("logo.jpg").scaled(360, 229, Qt.KeepAspectRatioByExpanding)            # load and scale the image to fit the splash screen size
     splash.setPixmap(pixmap)                                                                # set the loaded image to the scaled splash QLabel
     splash.setWindowFlags(Qt.SplashScreen | Qt.FramelessWindowHint)                         # set window flags to make it a splash screen and frameless   
     splash.setFixedSize(360, 229)                                                           # set fixed size for the splash screen
     splash.show()                                                                           # make the splash screen visible
+    QApplication.processEvents()                                                            # paint it now, before the window build blocks the event loop
+    return splash
+
+def Start_App(app, window, splash=None):
+    if splash is None:                                                                      # caller didn't put a splash up early; show one now
+        splash = Show_Splash()
 
-    # after 5 seconds, close splash and show main window
-    QTimer.singleShot(2000, lambda: (splash.close(), window.show()))                        # after 2 seconds, close splash and show main window, yay!
+    # window is built: show it and drop the splash straight away (no fixed delay)
+    window.show()
+    splash.close()
 
 # ----- End Constructors -----
 
@@ -267,11 +360,12 @@ def User_Page(start_callback, engine):
             QTimer.singleShot(1500, Reset_User_UI)
             return
 
+        from roster_cache import search_player                                              # imported on first search: keeps psycopg2 off the startup path
         result = search_player(player_id)                                                   # searches for the player with given ID and saves the result of search
 
         if result:                                                                          # if the user is found in the DB, add them to the game engine. 
             codename = result["codename"]
-            engine.join_player(codename)                                                    # adds the player to the game engine
+            engine.join_player(codename, player_id=player_id)                               # adds the player to the game engine (id kept for match history)
             local_ui_player_list.addItem(f"{codename} ({player_id})")                       # adds the player to the local UI list
 
             search_button.setEnabled(False)                                                 # disables the search button to prevent multiple clicks
@@ -291,10 +385,11 @@ def User_Page(start_callback, engine):
         player_id = int(id_input.text())
         codename = codename_input.text().strip()                                            # normalizes the codename input for a user mapped to their ID; removes leading/trailing whitespace
 
+        from roster_cache import add_player                                                 # cached, write-through version of db_helper.add_player
         success = add_player(player_id, codename)                                           # attempts to add the player to the DB, returns True if successful, False otherwise
 
         if success:
-            engine.join_player(codename)                                                    # adds the player to the game engine
+            engine.join_player(codename, player_id=player_id)                               # adds the player to the game engine (id kept for match history)
             local_ui_player_list.addItem(f"{codename} ({player_id})")                       # adds the player to the local UI list
 
             search_button.setEnabled(False)
@@ -308,6 +403,31 @@ def User_Page(start_callback, engine):
             QTimer.singleShot(1500, Reset_User_UI)
 
 
+    def Search_As_You_Type(text):                                                           # runs on every keystroke in the player search box
+        """List players whose codename (or id) starts with the typed text."""
+        search_results.clear()
+        if not text.strip():
+            search_results.hide()
+            return
+
+        try:
+            from roster_cache import search_prefix                                          # in-memory prefix index: no database query per key
+            players = search_prefix(text, SEARCH_RESULTS)
+        except Exception as e:                                                              # an exception escaping a Qt slot aborts the whole app
+            print(f"[ui] player search failed: {e}")
+            players = []
+        for player in players:
+            item = QListWidgetItem(f"{player['codename']} ({player['id']})")
+            item.setData(Qt.UserRole, (player["id"], player["codename"]))                   # keep id + codename for when the result is picked
+            search_results.addItem(item)
+        search_results.setVisible(search_results.count() > 0)
+
+    def Add_From_Search(item):                                                              # Enter / double-click on a search result adds that player
+        player_id, codename = item.data(Qt.UserRole)
+        engine.join_player(codename, player_id=player_id)
+        local_ui_player_list.addItem(f"{codename} ({player_id})")
+        search_box.clear()                                                                  # clearing the box also hides the result list
+
     def Reset_User_UI():                                                                    # now we must handle resetting the UI after a search/add operation
         codename_input.hide()                                                               # hides the codename input field
         add_button.hide()                                                                   # hides the add button                 
@@ -350,16 +470,25 @@ def User_Page(start_callback, engine):
     header_label.setStyleSheet("font-size: 16px; font-weight: bold; color: white;")
     header_layout.addWidget(header_label)
 
-    # unused text box (just placed to the right)
-    dummy_box = QLineEdit()
-    dummy_box.setPlaceholderText("Search Players (not working)")
-    dummy_box.setFixedWidth(180)
-    dummy_box.setAlignment(Qt.AlignCenter)
+    # search-as-you-type over codenames and ids (placed to the right)
+    search_box = QLineEdit()
+    search_box.setPlaceholderText("Search codename / ID")
+    search_box.setFixedWidth(180)
+    search_box.setAlignment(Qt.AlignCenter)
+    search_box.textChanged.connect(Search_As_You_Type)
     header_layout.addStretch()
-    header_layout.addWidget(dummy_box)
+    header_layout.addWidget(search_box)
+
+    # matches for the search box; hidden until there is something to show
+    search_results = QListWidget()
+    search_results.setStyleSheet("background-color: #2a2a2a; color: white; font-size: 16px; padding: 3px;")
+    search_results.setMaximumHeight(160)
+    search_results.itemActivated.connect(Add_From_Search)
+    search_results.hide()
 
     layout.addWidget(add_user_box)
     layout.addWidget(player_header)
+    layout.addWidget(search_results)
     layout.addWidget(local_ui_player_list)
     layout.addStretch()
 
@@ -455,38 +584,107 @@ def Build_Settings_Screen(start_callback, engine):
 ######## SCOREBOARD PAGE ########
 #################################
 
+##### Team Table Model #####
+# One model per team. The view asks it for cells; the window pushes score
+#   changes in with update_player(), which only signals the row that moved,
+#   and the engine's running team total in with set_total(), so nothing gets
+#   rebuilt while the game runs.
+class TeamTableModel(QAbstractTableModel):
+    totalChanged = pyqtSignal(int)                                                          # new team total, for the header label
+
+    def __init__(self, team, parent=None):
+        super().__init__(parent)
+        self.team = team
+        self._players = []                                                                  # row -> Player
+        self._row_of = {}                                                                   # hw_id -> row
+        self._scores = []                                                                   # row -> score currently displayed
+        self._total = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._players)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 2
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if role == Qt.DisplayRole:
+            return " " + self._players[row].username if col == 0 else str(self._scores[row])
+        if role == Qt.TextAlignmentRole:
+            return int((Qt.AlignLeft if col == 0 else Qt.AlignRight) | Qt.AlignVCenter)
+        return None
+
+    def total(self):
+        return self._total
+
+    def set_players(self, players):                                                         # full reload; only when the roster itself changes
+        self.beginResetModel()
+        self._players = list(players)
+        self._row_of = {p.hw_id: row for row, p in enumerate(self._players)}
+        self._scores = [p.score for p in self._players]
+        self.endResetModel()
+
+    def update_player(self, player):                                                        # in-place update of a single row
+        row = self._row_of.get(player.hw_id)
+        if row is None or self._scores[row] == player.score:
+            return
+        self._scores[row] = player.score
+        cell = self.index(row, 1)
+        self.dataChanged.emit(cell, cell, [Qt.DisplayRole])
+
+    def set_total(self, total):                                                             # header label only repaints when the total moves
+        if total != self._total:
+            self._total = total
+            self.totalChanged.emit(total)
+
+
 ##### Scoreboard Builder #####
-def Build_Scoreboard_Screen(start_callback, red_team=None, green_team=None):
+def Build_Scoreboard_Screen(start_callback, red_model=None, green_model=None):
 
     container = QWidget()
     container.setStyleSheet("background-color: #222;")
-    h_layout = QHBoxLayout(container)
+    v_layout = QVBoxLayout(container)
+
+    # Top middle: game clock (driven by engine.remaining(), see update_gametime)
+    clock_label = QLabel("0:00")
+    clock_label.setAlignment(Qt.AlignCenter)
+    clock_label.setStyleSheet("font-size: 24px; font-weight: bold; color: white;")
+    v_layout.addWidget(clock_label)
+    container.clock_label = clock_label                                                     # ScoreboardWindow updates this while the game runs
 
-    red_team = red_team or []
-    green_team = green_team or []
+    h_layout = QHBoxLayout()
+    v_layout.addLayout(h_layout)
+
+    red_model = red_model or TeamTableModel("red", container)
+    green_model = green_model or TeamTableModel("green", container)
 
     # Left: stacked scoreboards
     left_layout = QVBoxLayout()
     left_layout.setSpacing(20)
-    left_layout.addWidget(Build_Team_Table("Red Team", red_team, "#cc0000"))
-    left_layout.addWidget(Build_Team_Table("Green Team", green_team, "#00cc00"))
+    left_layout.addWidget(Build_Team_Table("Red Team", red_model, "#cc0000"))
+    left_layout.addWidget(Build_Team_Table("Green Team", green_model, "#00cc00"))
     h_layout.addLayout(left_layout)
 
     # Right: message box
-    message_box = QTextEdit()
+    message_box = QPlainTextEdit()                                                          # plain text: cheap appends, and a built-in line cap
     message_box.setReadOnly(True)
+    message_box.setMaximumBlockCount(FEED_MAX_LINES)                                        # oldest lines drop off; memory stays flat
     message_box.setPlaceholderText("Game messages will appear here...")
     message_box.setStyleSheet("font-size: 14px; background-color: #333; color: white;")
     h_layout.addWidget(message_box)
+    container.message_box = message_box                                                     # ScoreboardWindow.flush_feed appends here
 
     return container
 
 
 
 ##### TEAM TABLE BUILDER #####
-def Build_Team_Table(team_name, players, team_color):
-    table = QTableWidget(len(players), 2)
-    table.setEditTriggers(QTableWidget.NoEditTriggers)
+def Build_Team_Table(team_name, model, team_color):
+    table = QTableView()
+    table.setModel(model)
+    table.setEditTriggers(QTableView.NoEditTriggers)
     table.verticalHeader().setVisible(False)
     table.horizontalHeader().setVisible(False)
     table.setShowGrid(False)
@@ -495,15 +693,6 @@ def Build_Team_Table(team_name, players, team_color):
         "gridline-color: #1a1a1a; border-radius: 6px;"
     )
 
-    for row, p in enumerate(players):
-        name_item = QTableWidgetItem(" " + p.username)
-        score_item = QTableWidgetItem(str(p.score))
-        name_item.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-        score_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-        table.setItem(row, 0, name_item)
-        table.setItem(row, 1, score_item)
-
-
     table.horizontalHeader().setStretchLastSection(True)
     table.setColumnWidth(0, 200)
 
@@ -518,7 +707,8 @@ def Build_Team_Table(team_name, players, team_color):
     )
     header_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
 
-    total_label = QLabel(str(sum(p.score for p in players)))
+    total_label = QLabel(str(model.total()))
+    model.totalChanged.connect(lambda total: total_label.setText(str(total)))
     total_label.setStyleSheet(
         f"background-color: {team_color}; color: white; "
         "font-size: 16px; padding: 4px; border-top-right-radius: 2px; border-bottom-right-radius: 2px;"
@@ -537,13 +727,15 @@ def Build_Team_Table(team_name, players, team_color):
     return wrapper
 
 
-# need to create a game start countdown that goes from 30 ... 0 
-# this countdown will be at the top middle of the screen
-# it will appear while in the main
-# occurs after start is pressed and countdown begins
+# game clock at the top middle of the scoreboard; ScoreboardWindow calls this a few
+# times a second with engine.remaining() (exact, monotonic) while a game is running
 
-def update_gametime(self, seconds):
-    return 0
+def update_gametime(label, seconds):
+    seconds = max(0, int(seconds + 0.999))                                                  # round up: "0:01" until the last second is really gone
+    text = f"{seconds // 60}:{seconds % 60:02d}"
+    if label.text() != text:                                                                # only repaint when the displayed second changes
+        label.setText(text)
+    return seconds
 
 
     
@@ -0,0 +1,235 @@
+"""
+roster_cache.py
+---------------
+In-process cache of the players table.
+
+The table is small and rarely changes, so instead of a database round
+trip per lookup (which blocks the Qt thread) the whole table is loaded in
+one query and kept in two hash indexes:
+- by id        -> {id, codename}
+- by codename  -> {id, codename}
+plus two sorted prefix indexes (prefix_index.py) over codenames and the
+decimal ids, for search-as-you-type: search_prefix() answers each
+keystroke from memory.
+
+Lookups never touch the database once loaded. add_player()/delete_player()
+write through: the database first, then the cache. Lookups never load the
+table on the calling thread (the GUI thread, for search-as-you-type): a
+missing table, an expired TTL or invalidate() starts one background load,
+and concurrent preload() calls share a single query. If the database can't
+be reached, the load is retried at most every RETRY_INTERVAL seconds.
+Until a table is in memory, id/codename lookups fall back to db_helper
+directly and search_prefix() returns no matches.
+
+Module-level functions mirror db_helper's signatures and use the shared
+`roster` instance, so callers can swap the import.
+"""
+
+import threading
+import time
+
+import db_helper
+from prefix_index import PrefixIndex
+
+SEARCH_LIMIT = 20   # default number of search_prefix() matches
+RETRY_INTERVAL = 5.0    # seconds between load attempts after a failed one
+
+
+class RosterCache:
+    def __init__(self, ttl: float | None = None):
+        self.ttl = ttl                         # seconds before a reload; None = never
+        self._by_id:   dict[int, dict] = {}
+        self._by_name: dict[str, dict] = {}
+        self._name_prefix = PrefixIndex()          # codename -> id
+        self._id_prefix   = PrefixIndex()          # str(id) -> id
+        self._loaded_at: float | None = None   # monotonic time of last load
+        self._failed_at: float | None = None   # monotonic time of last failed load
+        self._loading = False                  # a load_async() thread is running
+        self._lock = threading.Lock()          # guards the tables
+        self._load_lock = threading.Lock()     # one fetch_all_players() at a time
+
+    # ---------------------------
+    # Loading
+    # ---------------------------
+    def preload(self) -> int:
+        """Load the whole players table in one query. Returns the row count.
+
+        If another thread is already loading, this waits for that load
+        instead of running a second query.
+        """
+        requested = time.monotonic()
+        with self._load_lock:
+            if self._loaded_at is not None and self._loaded_at >= requested:
+                return len(self._by_id)            # loaded while we waited
+            try:
+                rows = db_helper.fetch_all_players()
+            except Exception:
+                self._failed_at = time.monotonic()
+                raise
+            by_id, by_name = {}, {}
+            for player_id, codename in rows:
+                record = {"id": player_id, "codename": codename}
+                by_id[player_id] = record
+                by_name.setdefault(codename, record)   # first row wins, like fetchone()
+            name_prefix = PrefixIndex((r["codename"], player_id) for player_id, r in by_id.items())
+            id_prefix   = PrefixIndex((str(player_id), player_id) for player_id in by_id)
+            with self._lock:
+                self._by_id, self._by_name = by_id, by_name
+                self._name_prefix, self._id_prefix = name_prefix, id_prefix
+                self._loaded_at = time.monotonic()
+                self._failed_at = None
+            return len(by_id)
+
+    def load_async(self) -> bool:
+        """Start preload() on a background thread. Returns False (and does
+        nothing) if a load is running, or the last one failed less than
+        RETRY_INTERVAL seconds ago.
+        """
+        with self._lock:
+            if self._loading or self._load_lock.locked():
+                return False
+            if self._failed_at is not None and time.monotonic() - self._failed_at < RETRY_INTERVAL:
+                return False
+            self._loading = True
+        threading.Thread(target=self._load_in_background, daemon=True, name="roster-load").start()
+        return True
+
+    def _load_in_background(self):
+        try:
+            self.preload()
+        except Exception as e:
+            print(f"[roster_cache] load failed (retrying in {RETRY_INTERVAL:.0f}s): {e}")
+        finally:
+            self._loading = False
+
+    def invalidate(self):
+        """Forget the loaded table; the next lookup reloads it."""
+        with self._lock:
+            self._loaded_at = None
+            self._failed_at = None
+
+    @property
+    def loaded(self) -> bool:
+        if self._loaded_at is None:
+            return False
+        return self.ttl is None or time.monotonic() - self._loaded_at < self.ttl
+
+    def _ensure_loaded(self) -> bool:
+        """True if there is a table in memory to answer from (possibly past
+        its TTL). Never queries on the calling thread: a missing or expired
+        table is (re)loaded in the background.
+        """
+        if self.loaded:
+            return True
+        self.load_async()
+        return self._loaded_at is not None
+
+    # ---------------------------
+    # Lookups (same results as db_helper)
+    # ---------------------------
+    def search_player(self, player_id: int):
+        """Look up a player by ID. Returns dict {id, codename} or None."""
+        if not self._ensure_loaded():
+            return db_helper.search_player(player_id)
+        record = self._by_id.get(player_id)
+        return dict(record) if record else None
+
+    def get_player_by_name(self, codename: str):
+        """Look up a player by codename. Returns dict {id, codename} or None."""
+        if not self._ensure_loaded():
+            return db_helper.get_player_by_name(codename)
+        record = self._by_name.get(codename)
+        return dict(record) if record else None
+
+    def search_prefix(self, text: str, limit: int = SEARCH_LIMIT) -> list[dict]:
+        """
+        Players whose codename starts with text (case-insensitive), or whose id
+        does when text is a number; id matches come first. Returns up to limit
+        {id, codename} dicts, or [] while the table can't be loaded.
+        """
+        text = text.strip()
+        if not text or not self._ensure_loaded():
+            return []
+        with self._lock:
+            ids = self._id_prefix.search(text, limit) if text.isdigit() else []
+            if len(ids) < limit:
+                ids += [i for i in self._name_prefix.search(text, limit) if i not in ids][:limit - len(ids)]
+            return [dict(self._by_id[i]) for i in ids]
+
+    def all_players(self) -> list[dict]:
+        if not self._ensure_loaded():
+            return []
+        return [dict(r) for r in self._by_id.values()]
+
+    # ---------------------------
+    # Write-through
+    # ---------------------------
+    def add_player(self, player_id: int, codename: str) -> bool:
+        success = db_helper.add_player(player_id, codename)
+        if success:
+            self._put(player_id, codename)
+        return success
+
+    def delete_player(self, player_id: int) -> None:
+        db_helper.delete_player(player_id)
+        self._drop(player_id)
+
+    def _put(self, player_id: int, codename: str):
+        record = {"id": player_id, "codename": codename}
+        with self._lock:
+            old = self._by_id.get(player_id)
+            if old is not None:
+                self._name_prefix.remove(old["codename"], player_id)
+            else:
+                self._id_prefix.add(str(player_id), player_id)
+            self._by_id[player_id] = record
+            self._by_name.setdefault(codename, record)
+            self._name_prefix.add(codename, player_id)
+
+    def _drop(self, player_id: int):
+        with self._lock:
+            record = self._by_id.pop(player_id, None)
+            if record is None:
+                return
+            codename = record["codename"]
+            self._name_prefix.remove(codename, player_id)
+            self._id_prefix.remove(str(player_id), player_id)
+            if self._by_name.get(codename) is record:
+                # Another player may share the codename; point at them instead
+                del self._by_name[codename]
+                for other in self._by_id.values():
+                    if other["codename"] == codename:
+                        self._by_name[codename] = other
+                        break
+
+
+# Shared instance + db_helper-compatible functions
+roster = RosterCache()
+
+
+def preload() -> int:
+    return roster.preload()
+
+
+def invalidate():
+    roster.invalidate()
+
+
+def search_player(player_id: int):
+    return roster.search_player(player_id)
+
+
+def get_player_by_name(codename: str):
+    return roster.get_player_by_name(codename)
+
+
+def search_prefix(text: str, limit: int = SEARCH_LIMIT) -> list[dict]:
+    return roster.search_prefix(text, limit)
+
+
+def add_player(player_id: int, codename: str) -> bool:
+    return roster.add_player(player_id, codename)
+
+
+def delete_player(player_id: int) -> None:
+    roster.delete_player(player_id)
@@ -0,0 +1,60 @@
+"""
+roster_csv.py
+-------------
+The one roster CSV format, shared by headless runs, arenas and
+roster_tool imports (no database driver needed to read it).
+
+Each line is one of:
+    codename
+    id,codename
+    id,codename,team        (team: red | green; empty = let the engine pick)
+
+Blank lines are skipped, and so is a header on line 1 ("codename", or any
+first line whose id cell isn't a number). Unreadable lines are reported as
+(line_no, text) and skipped.
+
+    roster, errors = read_roster_csv("tonight.csv")   # [(codename, team, player_id), ...]
+"""
+
+import csv
+
+from hwid_alloc import TEAMS
+
+# First-line cells that mark a header row in a codename-only roster
+ROSTER_HEADERS = {"codename", "name", "username", "player", "players"}
+
+
+def read_roster_csv(path: str, require_id: bool = False):
+    """
+    Return ([(codename, team or None, player_id or None), ...], [(line_no, text), ...]).
+
+    require_id=True treats codename-only lines as errors (importing into
+    the players table needs an id).
+    """
+    roster, errors = [], []
+    with open(path, newline="", encoding="utf-8") as f:
+        for line_no, record in enumerate(csv.reader(f), start=1):
+            cells = [cell.strip() for cell in record]
+            if not any(cells):
+                continue
+            if len(cells) == 1:
+                if line_no == 1 and cells[0].lower() in ROSTER_HEADERS:
+                    continue                    # header of a codename-only file
+                if require_id:
+                    errors.append((line_no, ",".join(record)))
+                else:
+                    roster.append((cells[0], None, None))
+                continue
+            try:
+                player_id = int(cells[0])
+            except ValueError:
+                if line_no != 1:                # first line may be a header
+                    errors.append((line_no, ",".join(record)))
+                continue
+            codename = cells[1]
+            team = cells[2].lower() if len(cells) > 2 and cells[2] else None
+            if not codename or (team is not None and team not in TEAMS):
+                errors.append((line_no, ",".join(record)))
+                continue
+            roster.append((codename, team, player_id))
+    return roster, errors
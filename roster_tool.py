@@ -0,0 +1,79 @@
+"""
+roster_tool.py
+--------------
+Command-line seeding / migration for the players table.
+
+Usage:
+    python roster_tool.py init                       # create the players table
+    python roster_tool.py import roster.csv          # bulk upsert (id,codename)
+    python roster_tool.py import roster.csv --keep   # don't overwrite codenames
+    python roster_tool.py export roster.csv          # dump table ("-" = stdout)
+"""
+
+import argparse
+import sys
+
+import db_helper
+
+
+def cmd_init(args):
+    db_helper.init_db()
+    print("[roster_tool] players table ready")
+    return 0
+
+
+def cmd_import(args):
+    rows, errors = db_helper.read_roster_csv(args.file)
+    for line_no, text in errors:
+        print(f"[roster_tool] skipped line {line_no}: {text}", file=sys.stderr)
+
+    report = db_helper.import_players(rows, overwrite=not args.keep)
+    print(f"[roster_tool] {report['rows']} rows: {report['inserted']} inserted, "
+          f"{report['updated']} updated, {report['unchanged']} unchanged, "
+          f"{report['duplicates']} duplicate ids, {len(errors)} unreadable")
+
+    shown = report["conflicts"] if args.verbose else report["conflicts"][:20]
+    for player_id, stored, incoming in shown:
+        verb = "kept" if args.keep else "replaced"
+        print(f"[roster_tool] conflict id={player_id}: '{stored}' {verb} (file has '{incoming}')")
+    if len(shown) < len(report["conflicts"]):
+        print(f"[roster_tool] ... {len(report['conflicts']) - len(shown)} more conflicts (use -v)")
+    return 0
+
+
+def cmd_export(args):
+    if args.file == "-":
+        count = db_helper.export_players(sys.stdout)
+    else:
+        with open(args.file, "w", newline="", encoding="utf-8") as f:
+            count = db_helper.export_players(f)
+        print(f"[roster_tool] exported {count} players to {args.file}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed or migrate the Photon players table.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("init", help="create the players table if missing").set_defaults(func=cmd_init)
+
+    p_import = sub.add_parser("import", help="bulk upsert players from a CSV (id,codename)")
+    p_import.add_argument("file")
+    p_import.add_argument("--keep", action="store_true",
+                          help="keep existing codenames instead of overwriting them")
+    p_import.add_argument("-v", "--verbose", action="store_true", help="list every conflict")
+    p_import.set_defaults(func=cmd_import)
+
+    p_export = sub.add_parser("export", help="dump the players table as CSV")
+    p_export.add_argument("file", help="output path, or - for stdout")
+    p_export.set_defaults(func=cmd_export)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    finally:
+        db_helper.close_pool()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+"""
+score_store.py
+--------------
+Compact, array-backed score storage for the game engine.
+
+Every registered hardware ID gets a small integer slot. Per-player data
+lives in contiguous typed arrays indexed by that slot instead of in
+per-player objects, and each team's total is kept up to date on every
+score change, so reading a total is O(1) no matter how big the roster is.
+
+- scores[slot]       current score
+- teams[slot]        team index (see team_index())
+- hits[slot]         number of scoring hits (enemy or base) by that player
+- team_totals[team]  running sum of scores for that team
+
+Combat statistics, same layout (updated by the record_* methods, which
+only touch array cells, so scoring allocates nothing):
+
+- hits_dealt[slot]      players tagged (enemy or teammate)
+- hits_taken[slot]      times tagged by anyone
+- base_captures[slot]   scoring base hits (43 by red, 53 by green)
+- friendly_fire[slot]   teammates tagged
+- longest_streak[slot]  most enemy hits/base captures without being tagged
+                        or tagging a teammate in between
+- last_hit[slot]        wall-clock time (epoch seconds) of the last hit
+                        dealt, 0.0 if none
+
+stats(slot) reads one player's counters in O(1); export_stats() returns
+every live player's row for end-of-game reporting.
+
+Slots of removed players go on a free list and are reused; arrays grow by
+doubling, so registration stays amortised O(1) even for thousands of vests.
+
+slot_of_bytes maps the encoded hw_id to a slot *reference* (ref()), so the
+network thread can resolve raw datagram bytes without decoding. A
+reference is the slot plus the slot's generation, which remove() bumps:
+a hit queued for a player who is removed before it is applied no longer
+resolve()s, even if a new player has taken over the slot by then.
+
+An overall Leaderboard and one per team (see leaderboard.py) are updated
+on every score change, so top-K and rank queries never sort the roster.
+"""
+
+from array import array
+
+from leaderboard import Leaderboard
+
+NO_TEAM = -1
+
+# Slot references: low SLOT_BITS = slot, the bits above = generation
+# (wraps; kept small so a reference fits a 32-bit array('l') cell)
+SLOT_BITS = 20
+SLOT_MASK = (1 << SLOT_BITS) - 1
+GEN_MASK  = (1 << 11) - 1
+
+STAT_FIELDS = ("hits_dealt", "hits_taken", "base_captures", "friendly_fire",
+               "longest_streak", "last_hit")
+
+
+class ScoreStore:
+    def __init__(self, capacity: int = 64):
+        self.slot_of: dict[str, int]   = {}      # hw_id -> slot
+        self.slot_of_bytes: dict[bytes, int] = {}  # hw_id.encode() -> slot reference
+        self.hw_ids:  list[str | None] = []      # slot -> hw_id (None = free)
+        self._free:   list[int]        = []      # reusable slots
+
+        self.scores = array("q")
+        self.teams  = array("b")
+        self.hits   = array("L")
+        self.generation = array("H")             # bumped each time the slot is freed
+
+        # Combat statistics (streak is the current run behind longest_streak)
+        self.hits_dealt     = array("L")
+        self.hits_taken     = array("L")
+        self.base_captures  = array("L")
+        self.friendly_fire  = array("L")
+        self.streak         = array("L")
+        self.longest_streak = array("L")
+        self.last_hit       = array("d")
+
+        self.team_names:  list[str]      = []    # team index -> name
+        self._team_index: dict[str, int] = {}    # name -> team index
+        self.team_totals = array("q")
+
+        self.leaderboard = Leaderboard()                 # all players
+        self.team_boards: list[Leaderboard] = []         # team index -> Leaderboard
+
+        self._reserve(capacity)
+
+    def __len__(self):
+        return len(self.slot_of)
+
+    def __contains__(self, hw_id):
+        return hw_id in self.slot_of
+
+    # ---------------------------
+    # Teams
+    # ---------------------------
+    def team_index(self, team: str) -> int:
+        """Index of a team name, registering the team on first use."""
+        idx = self._team_index.get(team)
+        if idx is None:
+            idx = len(self.team_names)
+            self.team_names.append(team)
+            self._team_index[team] = idx
+            self.team_totals.append(0)
+            self.team_boards.append(Leaderboard())
+        return idx
+
+    def team_total(self, team: str) -> int:
+        idx = self._team_index.get(team)
+        return 0 if idx is None else self.team_totals[idx]
+
+    def team_size(self, team: str) -> int:
+        """Players currently on a team (O(1): the team leaderboard's length)."""
+        idx = self._team_index.get(team)
+        return 0 if idx is None else len(self.team_boards[idx])
+
+    # ---------------------------
+    # Slots
+    # ---------------------------
+    def add(self, hw_id: str, team: str) -> int:
+        """Allocate a slot for hw_id (score 0) and return it."""
+        if hw_id in self.slot_of:
+            raise KeyError(f"{hw_id} already registered")
+
+        if self._free:
+            slot = self._free.pop()
+            self.hw_ids[slot] = hw_id
+        else:
+            slot = len(self.hw_ids)
+            if slot > SLOT_MASK:
+                raise RuntimeError(f"score store full ({SLOT_MASK + 1} slots)")
+            if slot >= len(self.scores):
+                self._reserve(max(1, len(self.scores)) * 2)
+            self.hw_ids.append(hw_id)
+
+        self.slot_of[hw_id] = slot
+        self.slot_of_bytes[hw_id.encode()] = self.ref(slot)
+        self.scores[slot] = 0
+        self.hits[slot]   = 0
+        self._reset_stats(slot)
+        self.teams[slot]  = self.team_index(team)
+        self.leaderboard.add(slot)
+        self.team_boards[self.teams[slot]].add(slot)
+        return slot
+
+    def remove(self, hw_id: str):
+        """Release hw_id's slot; its score leaves the team total."""
+        slot = self.slot_of.pop(hw_id, None)
+        if slot is None:
+            return
+        self.slot_of_bytes.pop(hw_id.encode(), None)
+        team = self.teams[slot]
+        if team != NO_TEAM:
+            self.team_totals[team] -= self.scores[slot]
+            self.team_boards[team].remove(slot)
+        self.leaderboard.remove(slot)
+        self.scores[slot] = 0
+        self.hits[slot]   = 0
+        self._reset_stats(slot)
+        self.teams[slot]  = NO_TEAM
+        self.hw_ids[slot] = None
+        self.generation[slot] = (self.generation[slot] + 1) & GEN_MASK
+        self._free.append(slot)
+
+    def ref(self, slot: int) -> int:
+        """Reference to the slot's current occupant (see resolve())."""
+        return slot | (self.generation[slot] << SLOT_BITS)
+
+    def resolve(self, ref: int) -> int:
+        """Slot for a ref(), or -1 if that player has been removed since."""
+        slot = ref & SLOT_MASK
+        if (slot >= len(self.hw_ids) or self.hw_ids[slot] is None
+                or self.generation[slot] != ref >> SLOT_BITS):
+            return -1
+        return slot
+
+    def clear(self):
+        """Drop every player but keep the allocated arrays."""
+        for hw_id in list(self.slot_of):
+            self.remove(hw_id)
+
+    # ---------------------------
+    # Scoring (hot path)
+    # ---------------------------
+    def add_points(self, slot: int, points: int):
+        """Add (or subtract) points for one slot, its team total and the leaderboards."""
+        self.scores[slot] += points
+        team = self.teams[slot]
+        self.team_totals[team] += points
+        score = self.scores[slot]
+        self.leaderboard.update(slot, score)
+        self.team_boards[team].update(slot, score)
+
+    def set_score(self, slot: int, score: int):
+        self.add_points(slot, score - self.scores[slot])
+
+    # ---------------------------
+    # Combat statistics (hot path)
+    # ---------------------------
+    def record_enemy_hit(self, attacker: int, target: int, now: float):
+        self.hits_dealt[attacker] += 1
+        self.last_hit[attacker] = now
+        streak = self.streak[attacker] + 1
+        self.streak[attacker] = streak
+        if streak > self.longest_streak[attacker]:
+            self.longest_streak[attacker] = streak
+        self.hits_taken[target] += 1
+        self.streak[target] = 0
+
+    def record_friendly_fire(self, attacker: int, target: int, now: float):
+        self.hits_dealt[attacker] += 1
+        self.friendly_fire[attacker] += 1
+        self.last_hit[attacker] = now
+        self.streak[attacker] = 0
+        self.hits_taken[target] += 1
+        self.streak[target] = 0
+
+    def record_base_capture(self, attacker: int, now: float):
+        self.base_captures[attacker] += 1
+        self.last_hit[attacker] = now
+        streak = self.streak[attacker] + 1
+        self.streak[attacker] = streak
+        if streak > self.longest_streak[attacker]:
+            self.longest_streak[attacker] = streak
+
+    def stats(self, slot: int) -> dict:
+        """One slot's combat statistics (STAT_FIELDS)."""
+        return {
+            "hits_dealt":     self.hits_dealt[slot],
+            "hits_taken":     self.hits_taken[slot],
+            "base_captures":  self.base_captures[slot],
+            "friendly_fire":  self.friendly_fire[slot],
+            "longest_streak": self.longest_streak[slot],
+            "last_hit":       self.last_hit[slot],
+        }
+
+    def export_stats(self) -> list[dict]:
+        """Every live player's hw_id, team, score and statistics, in slot order."""
+        rows = []
+        for slot, hw_id in enumerate(self.hw_ids):
+            if hw_id is None:
+                continue
+            row = {"hw_id": hw_id, "team": self.team_names[self.teams[slot]],
+                   "score": self.scores[slot], "hits": self.hits[slot]}
+            row.update(self.stats(slot))
+            rows.append(row)
+        return rows
+
+    def _reset_stats(self, slot: int):
+        self.hits_dealt[slot]     = 0
+        self.hits_taken[slot]     = 0
+        self.base_captures[slot]  = 0
+        self.friendly_fire[slot]  = 0
+        self.streak[slot]         = 0
+        self.longest_streak[slot] = 0
+        self.last_hit[slot]       = 0.0
+
+    # ---------------------------
+    # Rankings
+    # ---------------------------
+    def top(self, k: int | None = None, team: str | None = None) -> list[tuple[int, int]]:
+        """Best k (slot, score) pairs overall or within one team."""
+        if team is None:
+            return self.leaderboard.top(k)
+        idx = self._team_index.get(team)
+        return [] if idx is None else self.team_boards[idx].top(k)
+
+    def rank(self, slot: int, within_team: bool = False) -> int | None:
+        """1-based rank of a slot overall or within its own team (None if free)."""
+        if not within_team:
+            return self.leaderboard.rank(slot)
+        team = self.teams[slot]
+        return None if team == NO_TEAM else self.team_boards[team].rank(slot)
+
+    def _reserve(self, capacity: int):
+        grow = capacity - len(self.scores)
+        if grow <= 0:
+            return
+        self.scores.extend([0] * grow)
+        self.teams.extend([NO_TEAM] * grow)
+        self.hits.extend([0] * grow)
+        self.generation.extend([0] * grow)
+        for counters in (self.hits_dealt, self.hits_taken, self.base_captures,
+                         self.friendly_fire, self.streak, self.longest_streak):
+            counters.extend([0] * grow)
+        self.last_hit.extend([0.0] * grow)
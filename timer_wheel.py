@@ -0,0 +1,145 @@
+"""
+timer_wheel.py
+--------------
+Hashed timer wheel on time.monotonic(), run by a thread the caller
+already has (the engine's send thread).
+
+Timers hash into `slots` buckets by their tick (deadline / tick, rounded
+up so nothing fires early). advance() walks the buckets for the ticks that
+have passed since the last call and runs whatever is due, in deadline
+order. Scheduling and cancelling are O(1); an advance() with nothing due
+is one float compare, so it can be called on every loop iteration.
+
+    wheel = TimerWheel()
+    handle = wheel.schedule(3.0, send_code, "202")
+    wheel.cancel(handle)
+    ...
+    wheel.advance()                       # in the owning loop
+    timeout = wheel.time_until_next()     # how long that loop may sleep
+"""
+
+import math
+import threading
+import time
+
+DEFAULT_TICK  = 0.01    # seconds per wheel tick
+DEFAULT_SLOTS = 256     # buckets; longer delays wrap around and wait their turn
+
+
+class Timer:
+    __slots__ = ("when", "tick", "callback", "args", "cancelled")
+
+    def __init__(self, when: float, tick: int, callback, args):
+        self.when = when
+        self.tick = tick
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+
+class TimerWheel:
+    def __init__(self, tick: float = DEFAULT_TICK, slots: int = DEFAULT_SLOTS,
+                 clock=time.monotonic, on_error=None):
+        self.tick  = tick
+        self.clock = clock
+        self.on_error = on_error                # called with the exception if a callback raises
+
+        self._slots: list[list[Timer]] = [[] for _ in range(slots)]
+        self._current = int(clock() / tick)     # last tick processed
+        self._next_when = math.inf              # earliest pending deadline
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._pending
+
+    # ---------------------------
+    # Scheduling (any thread)
+    # ---------------------------
+    def schedule(self, delay: float, callback, *args) -> Timer:
+        """Run callback(*args) once, delay seconds from now."""
+        return self.call_at(self.clock() + max(0.0, delay), callback, *args)
+
+    def call_at(self, when: float, callback, *args) -> Timer:
+        """Run callback(*args) once at monotonic time `when`."""
+        tick = max(math.ceil(when / self.tick), self._current + 1)
+        timer = Timer(when, tick, callback, args)
+        with self._lock:
+            self._slots[tick % len(self._slots)].append(timer)
+            self._pending += 1
+            if when < self._next_when:
+                self._next_when = when
+        return timer
+
+    def cancel(self, timer: Timer | None):
+        """Stop a pending timer from firing (it is dropped when its bucket comes round)."""
+        if timer is not None:
+            timer.cancelled = True
+
+    def clear(self):
+        with self._lock:
+            for slot in self._slots:
+                slot.clear()
+            self._pending = 0
+            self._next_when = math.inf
+
+    # ---------------------------
+    # Driving (owning thread)
+    # ---------------------------
+    def time_until_next(self, now: float | None = None) -> float:
+        """Seconds until the earliest pending deadline (inf when idle)."""
+        if now is None:
+            now = self.clock()
+        return max(0.0, self._next_when - now)
+
+    def advance(self, now: float | None = None) -> int:
+        """Run every timer whose deadline has passed. Returns how many ran."""
+        if now is None:
+            now = self.clock()
+        if now < self._next_when:
+            return 0
+
+        done = int(now / self.tick)             # ticks fully in the past
+        target = math.ceil(now / self.tick)     # bucket now falls in: check it too
+        slots = self._slots
+        n = len(slots)
+        due: list[Timer] = []
+        with self._lock:
+            steps = target - self._current
+            if steps <= 0:
+                indices = (target % n,)
+            elif steps >= n:
+                indices = range(n)
+            else:
+                indices = [(self._current + i) % n for i in range(1, steps + 1)]
+            for i in indices:
+                slot = slots[i]
+                if not slot:
+                    continue
+                keep = []
+                for timer in slot:
+                    if timer.when <= now:
+                        due.append(timer)
+                    elif not timer.cancelled:
+                        keep.append(timer)
+                    else:
+                        self._pending -= 1
+                slots[i] = keep
+            self._current = max(self._current, done)
+            self._pending -= len(due)
+            self._next_when = min((t.when for slot in slots for t in slot if not t.cancelled),
+                                  default=math.inf)
+
+        ran = 0
+        due.sort(key=lambda t: t.when)
+        for timer in due:
+            if timer.cancelled:
+                continue
+            try:
+                timer.callback(*timer.args)
+            except Exception as e:
+                if self.on_error is None:
+                    raise
+                self.on_error(e)
+            ran += 1
+        return ran
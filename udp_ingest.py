@@ -0,0 +1,178 @@
+"""
+udp_ingest.py
+-------------
+Batched UDP receive helpers shared by the game engines.
+
+The traffic generator fires one "ATTACKER:TARGET" datagram per hit. When a
+whole arena shoots at once the kernel queues hundreds of them; reading one
+packet per wakeup falls behind and the receive buffer overflows. These
+helpers let a listen thread sleep in a selector, then drain everything that
+is waiting on the (non-blocking) socket in one go and parse it as a batch.
+
+- open_recv_socket(): bound UDP socket with an enlarged receive buffer
+- drain():            read every queued datagram (up to a cap) without blocking
+- parse_batch():      split raw datagrams into hit tuples + replies to send
+- parse_batch_resolved(): bytes-level parse straight to (slot, target) ints
+- IngestStats:        packets-per-wakeup counters for diagnostics
+"""
+
+import socket
+from array import array
+
+MAX_DATAGRAM      = 2048      # same read size the per-packet loop used
+MAX_BATCH         = 512       # upper bound on packets read per wakeup
+RECV_BUFFER_BYTES = 1 << 20   # ask the kernel for ~1 MiB of receive buffer
+
+
+def open_recv_socket(port: int, blocking: bool = False) -> socket.socket:
+    """Create and bind the hit-receiving socket on 0.0.0.0:port.
+
+    blocking=False gives a non-blocking socket for selector-driven drains;
+    blocking=True keeps the old 1 s timeout behaviour.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_BUFFER_BYTES)
+    except OSError:
+        pass  # kernel may cap or refuse the size; the default still works
+    sock.bind(("0.0.0.0", port))
+    if blocking:
+        sock.settimeout(1.0)
+    else:
+        sock.setblocking(False)
+    return sock
+
+
+def drain(sock: socket.socket, max_packets: int = MAX_BATCH) -> list[bytes]:
+    """Read queued datagrams from a non-blocking socket until it would block."""
+    packets: list[bytes] = []
+    recv = sock.recv
+    try:
+        while len(packets) < max_packets:
+            packets.append(recv(MAX_DATAGRAM))
+    except (BlockingIOError, InterruptedError):
+        pass
+    return packets
+
+
+def parse_batch(packets: list[bytes]):
+    """Parse raw datagrams into (events, replies, rejected).
+
+    events   -- list of (attacker, target) string tuples, in arrival order
+    replies  -- plain strings to queue for sending ("OK", "ERR:bad-format")
+    rejected -- (reason, msg) pairs for packets that were not hits
+    """
+    events:   list[tuple[str, str]] = []
+    replies:  list[str]             = []
+    rejected: list[tuple[str, str]] = []
+
+    for data in packets:
+        msg = data.decode(errors="ignore").strip()
+        if not msg:
+            continue
+
+        attacker, sep, target = msg.partition(":")
+        if not sep:
+            # Not a hit packet; still reply so the generator doesn't hang
+            replies.append("OK")
+            rejected.append(("unknown", msg))
+            continue
+
+        attacker = attacker.strip()
+        target   = target.strip()
+        if attacker and target:
+            events.append((attacker, target))
+        else:
+            replies.append("ERR:bad-format")
+            rejected.append(("bad", msg))
+
+    return events, replies, rejected
+
+
+def parse_batch_resolved(packets: list[bytes], slot_of: dict[bytes, int],
+                         base_codes: dict[bytes, int]):
+    """Parse raw datagrams without decoding and resolve IDs before queuing.
+
+    slot_of maps encoded hw_ids to player slots (or slot references); base_codes maps b"43"/b"53"
+    to the (negative) target codes the scorer understands.
+
+    events   -- flat array('l') of attacker_slot, target_code pairs
+    replies  -- plain strings to queue for sending ("OK", "ERR:...")
+    rejected -- (reason, msg) pairs; reason is "unknown", "bad",
+                "unknown_attacker" or "unknown_target"
+    """
+    events = array("l")
+    append = events.append
+    replies:  list[str]             = []
+    rejected: list[tuple[str, str]] = []
+    get_slot = slot_of.get
+    get_base = base_codes.get
+
+    for data in packets:
+        attacker, sep, target = data.partition(b":")
+        if not sep:
+            msg = data.strip()
+            if msg:
+                # Not a hit packet; still reply so the generator doesn't hang
+                replies.append("OK")
+                rejected.append(("unknown", msg.decode(errors="ignore")))
+            continue
+
+        attacker = attacker.strip()
+        target   = target.strip()
+        if not attacker or not target:
+            replies.append("ERR:bad-format")
+            rejected.append(("bad", data.decode(errors="ignore").strip()))
+            continue
+
+        slot = get_slot(attacker)
+        if slot is None:
+            replies.append("ERR:unknown-attacker")
+            rejected.append(("unknown_attacker", attacker.decode(errors="ignore")))
+            continue
+
+        code = get_base(target)
+        if code is None:
+            code = get_slot(target)
+            if code is None:
+                replies.append("ERR:unknown-target")
+                rejected.append(("unknown_target", target.decode(errors="ignore")))
+                continue
+
+        append(slot)
+        append(code)
+
+    return events, replies, rejected
+
+
+class IngestStats:
+    """Counters describing how the listen loop is keeping up."""
+
+    def __init__(self):
+        self.wakeups   = 0   # selector wakeups that produced at least one packet
+        self.packets   = 0   # datagrams read in total
+        self.events    = 0   # valid hit tuples queued
+        self.last_batch = 0  # packets read on the most recent wakeup
+        self.max_batch  = 0  # largest single drain seen
+
+    def record(self, n_packets: int, n_events: int):
+        self.wakeups += 1
+        self.packets += n_packets
+        self.events  += n_events
+        self.last_batch = n_packets
+        if n_packets > self.max_batch:
+            self.max_batch = n_packets
+
+    @property
+    def packets_per_wakeup(self) -> float:
+        return self.packets / self.wakeups if self.wakeups else 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "wakeups": self.wakeups,
+            "packets": self.packets,
+            "events": self.events,
+            "last_batch": self.last_batch,
+            "max_batch": self.max_batch,
+            "packets_per_wakeup": round(self.packets_per_wakeup, 2),
+        }
@@ -0,0 +1,66 @@
+"""
+udp_send.py
+-----------
+Outbound-side helpers for the engine's send thread.
+
+_apply_hit queues one or two hardware-ID broadcasts per hit, plus ERR/OK
+replies, so under heavy fire the sender sees long runs of small messages.
+Instead of one queue.get() + sendto() per wakeup, the send thread pulls a
+whole batch off send_queue and transmits it in one pass.
+
+- Coalescer: optional policy that suppresses a hit broadcast identical to
+  one already sent within a short window (e.g. the same target hw_id hit
+  by three shooters in 5 ms goes out once). Control codes (202/221),
+  REG: broadcasts and OK/ERR replies are never coalesced.
+- SendStats: queued / sent / coalesced / dropped counters.
+"""
+
+DEFAULT_SEND_BATCH = 64     # max datagrams sent per wakeup
+
+# Lines that must always go out, however often they repeat
+NEVER_COALESCE        = {"202", "221", "OK"}
+NEVER_COALESCE_PREFIX = ("REG:", "ERR:")
+
+
+class Coalescer:
+    def __init__(self, window: float):
+        self.window = window                  # seconds
+        self._last_sent: dict[str, float] = {}
+
+    def suppress(self, line: str, now: float) -> bool:
+        """True if line is a redundant repeat inside the window (don't send it)."""
+        if line in NEVER_COALESCE or line.startswith(NEVER_COALESCE_PREFIX):
+            return False
+        last = self._last_sent.get(line)
+        if last is not None and now - last < self.window:
+            return True
+        if len(self._last_sent) > 4096:        # roster-sized in practice; keep it bounded
+            self._last_sent.clear()
+        self._last_sent[line] = now
+        return False
+
+
+class SendStats:
+    def __init__(self):
+        self.queued    = 0   # lines handed to send_text()/send_code()
+        self.sent      = 0   # datagrams actually transmitted
+        self.coalesced = 0   # suppressed by the coalescing policy / merged in send_queue
+        self.dropped   = 0   # shed by send_queue, send failures, left unsent at shutdown
+        self.batches   = 0   # sender wakeups that sent something
+        self.max_batch = 0
+
+    def record_batch(self, n: int):
+        self.batches += 1
+        if n > self.max_batch:
+            self.max_batch = n
+
+    def snapshot(self) -> dict:
+        return {
+            "queued": self.queued,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "max_batch": self.max_batch,
+            "msgs_per_batch": round((self.sent + self.coalesced) / self.batches, 2) if self.batches else 0.0,
+        }